@@ -0,0 +1,139 @@
+import random
+
+
+class ShortestPathDAG():
+    """
+    Every shortest path between two people, kept implicitly as the
+    breadth-first depth of each person and the level each movie was
+    expanded at.
+
+    A person at depth k is reached on a shortest path from each star at
+    depth k - 1 of each of their movies expanded at level k - 1, so
+    those (movie, star) pairs are the person's parents in the DAG and
+    no parent lists need storing.
+    """
+    def __init__(self, graph, source, target):
+        self.graph = graph
+        self.source = source
+        self.target = target
+
+        self.depths = {source: 0}
+        self.movie_levels = {}
+        self.counts = None
+
+        # people in different components need no search at all
+        self.connected = graph.connected(source, target)
+        if not self.connected:
+            return
+
+        # level-synchronous search: every level is finished before the
+        # target is checked, so all of the target's parents are labeled
+        frontier = [source]
+        depth = 0
+        while frontier and target not in self.depths:
+            next_frontier = []
+            for person in frontier:
+                for movie in graph.movies_of(person):
+                    if movie in self.movie_levels:
+                        continue
+                    self.movie_levels[movie] = depth
+                    for star in graph.stars_of(movie):
+                        if star not in self.depths:
+                            self.depths[star] = depth + 1
+                            next_frontier.append(star)
+            frontier = next_frontier
+            depth += 1
+
+    def parents(self, person):
+        """
+        Yields the (movie, person) pairs one step back towards the
+        source on a shortest path through `person`.
+        """
+        level = self.depths[person] - 1
+        for movie in self.graph.movies_of(person):
+            if self.movie_levels.get(movie) != level:
+                continue
+            for star in self.graph.stars_of(movie):
+                if self.depths.get(star) == level:
+                    yield movie, star
+
+    def paths(self):
+        """
+        Yields every shortest list of (movie, person) index pairs
+        from the source to the target, one at a time.
+        """
+        if not self.connected:
+            return
+
+        # steps from the target back to the person being walked from
+        steps = []
+
+        def walk(person):
+            if person == self.source:
+                yield steps[::-1]
+                return
+            for movie, parent in self.parents(person):
+                steps.append((movie, person))
+                yield from walk(parent)
+                steps.pop()
+
+        yield from walk(self.target)
+
+    def count(self):
+        """
+        Returns the number of shortest paths without listing them.
+        """
+        if not self.connected:
+            return 0
+        return self.path_counts()[self.target]
+
+    def path_counts(self):
+        """
+        Returns how many shortest paths lead from the source to each
+        person that lies on a shortest path to the target.
+        """
+        if self.counts is not None:
+            return self.counts
+
+        # collecting the DAG's people level by level back from the target
+        layers = [[self.target]]
+        seen = {self.target}
+        while layers[-1][0] != self.source:
+            layer = []
+            for person in layers[-1]:
+                for _, parent in self.parents(person):
+                    if parent not in seen:
+                        seen.add(parent)
+                        layer.append(parent)
+            layers.append(layer)
+
+        # then adding up path counts forwards from the source
+        counts = {self.source: 1}
+        for layer in reversed(layers[:-1]):
+            for person in layer:
+                counts[person] = sum(counts[parent] for _, parent in self.parents(person))
+
+        self.counts = counts
+        return counts
+
+    def sample(self, rng=random):
+        """
+        Returns one shortest path chosen uniformly at random,
+        or None if the two people aren't connected.
+        """
+        if not self.connected:
+            return None
+        counts = self.path_counts()
+
+        # walking back from the target, picking each parent in proportion
+        # to the number of shortest paths that lead to it
+        path = []
+        person = self.target
+        while person != self.source:
+            parents = list(self.parents(person))
+            weights = [counts[parent] for _, parent in parents]
+            movie, parent = rng.choices(parents, weights=weights)[0]
+            path.append((movie, person))
+            person = parent
+        path.reverse()
+        return path
@@ -0,0 +1,112 @@
+import json
+import multiprocessing
+import os
+import sys
+
+import degrees
+
+# Pairs handed to a worker at a time
+CHUNK_SIZE = 64
+
+
+def main():
+    if len(sys.argv) not in [2, 3, 4]:
+        sys.exit("Usage: python batch.py directory [pairs] [workers]")
+
+    # Parse command-line arguments
+    directory = sys.argv[1]
+    pairs = sys.argv[2] if len(sys.argv) >= 3 else "-"
+    workers = int(sys.argv[3]) if len(sys.argv) == 4 else os.cpu_count()
+
+    # Load the graph once; forked workers share it read-only
+    degrees.load_data(directory)
+
+    f = sys.stdin if pairs == "-" else open(pairs, encoding="utf-8")
+    with f:
+        for result in answer_all(f, directory, workers):
+            print(json.dumps(result))
+
+
+def answer_all(lines, directory, workers):
+    """
+    Yields one result dictionary per line of `lines`, in order,
+    answering the queries on a pool of `workers` processes.
+    """
+    if workers <= 1:
+        yield from map(answer, lines)
+        return
+
+    # forking lets workers inherit the loaded graph without copying it;
+    # elsewhere each worker maps the on-disk snapshot itself
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("fork" if "fork" in methods else None)
+    with context.Pool(workers, initializer=init_worker, initargs=(directory,)) as pool:
+        yield from pool.imap(answer, lines, chunksize=CHUNK_SIZE)
+
+
+def init_worker(directory):
+    """
+    Make sure a worker process has the graph loaded.
+    """
+    if degrees.graph is None:
+        degrees.load_data(directory)
+
+
+def answer(line):
+    """
+    Answers one tab-separated "source<TAB>target" line.
+    """
+    fields = line.rstrip("\r\n").split("\t")
+    if len(fields) != 2:
+        return {"query": line.rstrip("\r\n"), "error": "expected source<TAB>target"}
+    return answer_pair(fields[0], fields[1])
+
+
+def answer_pair(source, target):
+    """
+    Answers one query where each side is a person's name or IMDB id.
+
+    Returns a dictionary with the path as [movie_id, person_id] pairs,
+    or with an "error" entry if the query can't be answered.
+    """
+    result = {"source": source, "target": target}
+
+    source, error = resolve(source)
+    if error is None:
+        target, error = resolve(target)
+    if error is not None:
+        result["error"] = error
+        return result
+
+    path = degrees.shortest_path(source, target)
+    if path is None:
+        result["degrees"] = None
+        result["path"] = None
+    else:
+        result["degrees"] = len(path)
+        result["path"] = [list(step) for step in path]
+    return result
+
+
+def resolve(query):
+    """
+    Returns (person_id, error) for an IMDB id or a person's name.
+
+    Unlike degrees.person_id_for_name this never prompts: a name shared
+    by several people is reported as an error listing their ids.
+    """
+    if degrees.graph.person_index(query) is not None:
+        return query, None
+    person_ids = [
+        degrees.graph.person_ids[person]
+        for person in degrees.graph.people_named(query)
+    ]
+    if len(person_ids) == 0:
+        return None, f"person not found: {query}"
+    elif len(person_ids) > 1:
+        return None, f"ambiguous name: {query} ({', '.join(person_ids)})"
+    return person_ids[0], None
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+import json
+import multiprocessing
+import os
+import platform
+import random
+import sys
+import time
+
+import degrees
+from landmarks import bfs_distances
+from loadtest import summarize
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# Targets drawn from each source's search, so one search serves several pairs
+PAIRS_PER_SOURCE = 10
+
+
+def main():
+    if len(sys.argv) not in [2, 3, 4]:
+        sys.exit("Usage: python benchmark.py directory [queries] [output]")
+
+    # Parse command-line arguments
+    directory = sys.argv[1]
+    queries = int(sys.argv[2]) if len(sys.argv) >= 3 else 100
+    output = sys.argv[3] if len(sys.argv) == 4 else None
+
+    report = benchmark(directory, queries)
+    print_report(report)
+    if output is not None:
+        with open(output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+def benchmark(directory, queries=100, seed=0):
+    """
+    Measure loading and querying the dataset in `directory`.
+
+    Returns a JSON-serializable report with load times and peak memory
+    for a CSV parse and a snapshot load, and latency percentiles in
+    milliseconds for `queries` near, far and disconnected pairs under
+    each search method.
+    """
+    report = {
+        "dataset": os.path.abspath(directory),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "load": {
+            "csv": measure_load(directory, rebuild=True),
+            "snapshot": measure_load(directory, rebuild=False)
+        }
+    }
+
+    degrees.load_data(directory)
+    graph = degrees.graph
+    report["graph"] = {
+        "people": graph.num_people,
+        "movies": graph.num_movies,
+        "stars": len(graph.person_movies),
+        **graph.component_stats()
+    }
+
+    pairs = sample_pairs(graph, queries, random.Random(seed))
+
+    # each method runs on the same pairs; landmarks go last since
+    # the "alt" method needs them loaded
+    methods = {}
+    degrees.landmarks = None
+    methods["bidirectional"] = time_queries(pairs, method="bidirectional")
+    methods["breadth_first"] = time_queries(pairs, method="breadth_first")
+
+    start = time.perf_counter()
+    degrees.load_landmarks(directory)
+    report["landmarks_seconds"] = round(time.perf_counter() - start, 3)
+    methods["landmarks"] = time_queries(pairs, method="alt")
+    degrees.landmarks = None
+
+    report["queries"] = methods
+    return report
+
+
+def measure_load(directory, rebuild):
+    """
+    Load the dataset in a fresh process, so peak memory covers loading
+    alone, and return the load time and peak resident set size.
+    """
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    process = context.Process(target=load_in_child, args=(directory, rebuild, results))
+    process.start()
+    result = results.get()
+    process.join()
+    return result
+
+
+def load_in_child(directory, rebuild, results):
+    if rebuild:
+        try:
+            os.remove(os.path.join(directory, degrees.SNAPSHOT))
+        except FileNotFoundError:
+            pass
+    start = time.perf_counter()
+    degrees.load_data(directory)
+    seconds = time.perf_counter() - start
+    results.put({"seconds": round(seconds, 3), "peak_rss_mb": peak_rss_mb()})
+
+
+def peak_rss_mb():
+    """
+    Returns this process's peak resident set size in megabytes,
+    or None where the resource module isn't available.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # Linux reports kilobytes, macOS reports bytes
+    if sys.platform == "darwin":
+        peak /= 1024
+    return round(peak / 1024, 1)
+
+
+def sample_pairs(graph, queries, rng):
+    """
+    Returns `queries` (source, target) IMDB id pairs in each of three
+    categories: "near" pairs one or two movies apart, "far" pairs as
+    far apart as their component allows, and "disconnected" pairs.
+
+    Sources come from the largest component, where searches are slowest.
+    """
+    largest = max(range(len(graph.component_sizes)), key=graph.component_sizes.__getitem__)
+    if graph.component_sizes[largest] < 2:
+        return {}
+
+    categories = ["near", "far"]
+    if graph.component_sizes[largest] < graph.num_people:
+        categories.append("disconnected")
+    pairs = {category: [] for category in categories}
+
+    while min(len(category_pairs) for category_pairs in pairs.values()) < queries:
+        source = rng.randrange(graph.num_people)
+        if graph.components[source] != largest:
+            continue
+        distances = bfs_distances(graph, source)
+        farthest = max(distances)
+
+        targets = {
+            "near": [person for person, distance in enumerate(distances) if 0 < distance <= 2],
+            "far": [person for person, distance in enumerate(distances) if distance == farthest]
+        }
+        if "disconnected" in pairs:
+            targets["disconnected"] = []
+            while len(targets["disconnected"]) < PAIRS_PER_SOURCE:
+                target = rng.randrange(graph.num_people)
+                if graph.components[target] != largest:
+                    targets["disconnected"].append(target)
+
+        for category in categories:
+            chosen = rng.sample(targets[category], min(PAIRS_PER_SOURCE, len(targets[category])))
+            pairs[category].extend((source, target) for target in chosen)
+
+    return {
+        category: [
+            (graph.person_ids[source], graph.person_ids[target])
+            for source, target in category_pairs[:queries]
+        ]
+        for category, category_pairs in pairs.items()
+    }
+
+
+def time_queries(pairs, **options):
+    """
+    Returns latency percentiles in milliseconds for each category
+    of pairs, along with the average path length found.
+    """
+    results = {}
+    for category, category_pairs in pairs.items():
+        latencies = []
+        lengths = []
+        for source, target in category_pairs:
+            start = time.perf_counter()
+            path = degrees.shortest_path(source, target, **options)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if path is not None:
+                lengths.append(len(path))
+        latencies.sort()
+        results[category] = summarize(latencies)
+        results[category]["queries"] = len(latencies)
+        results[category]["mean_degrees"] = (
+            round(sum(lengths) / len(lengths), 2) if lengths else None
+        )
+    return results
+
+
+def print_report(report):
+    graph = report["graph"]
+    print(f"{report['dataset']}: {graph['people']} people, {graph['movies']} movies, "
+          f"{graph['stars']} stars, {graph['components']} components")
+    for kind, load in report["load"].items():
+        print(f"  load from {kind}: {load['seconds']:.3f}s, peak RSS {load['peak_rss_mb']} MB")
+    print(f"  landmarks built in {report['landmarks_seconds']:.3f}s")
+
+    print(f"  {'method':<14} {'pairs':<13} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for method, categories in report["queries"].items():
+        for category, stats in categories.items():
+            if "p50" not in stats:
+                continue
+            print(f"  {method:<14} {category:<13} {stats['p50']:>9.3f} {stats['p90']:>9.3f} "
+                  f"{stats['p99']:>9.3f} {stats['max']:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
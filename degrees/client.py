@@ -0,0 +1,52 @@
+import json
+import sys
+from http.client import HTTPConnection
+from urllib.parse import urlencode
+
+from server import HOST, PORT
+
+
+class DegreesClient():
+    """
+    Client for a running degrees server.
+
+    Keeps one HTTP connection open, so each thread
+    should use its own client.
+    """
+    def __init__(self, host=HOST, port=PORT):
+        self.connection = HTTPConnection(host, port)
+
+    def request(self, path, **params):
+        self.connection.request("GET", f"{path}?{urlencode(params)}")
+        response = self.connection.getresponse()
+        return json.loads(response.read())
+
+    def shortest_path(self, source, target):
+        """
+        Returns the server's answer for a path between two people,
+        each given by name or IMDB id.
+        """
+        return self.request("/path", source=source, target=target)
+
+    def person_ids_for_name(self, name):
+        """
+        Returns the IMDB ids of everyone with the given name.
+        """
+        return self.request("/person", name=name)["person_ids"]
+
+    def close(self):
+        self.connection.close()
+
+
+def main():
+    if len(sys.argv) not in [3, 4]:
+        sys.exit("Usage: python client.py source target [port]")
+    port = int(sys.argv[3]) if len(sys.argv) == 4 else PORT
+
+    client = DegreesClient(port=port)
+    print(json.dumps(client.shortest_path(sys.argv[1], sys.argv[2]), indent=2))
+    client.close()
+
+
+if __name__ == "__main__":
+    main()
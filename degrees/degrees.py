@@ -1,55 +1,84 @@
-import csv
+import os
+import random
 import sys
 
+from allpaths import ShortestPathDAG
+from graph import Graph, csv_fingerprint, read_snapshot, write_snapshot
+from landmarks import Landmarks
+from treecache import TreeCache
 from util import Node, StackFrontier, QueueFrontier
 
-# Maps names to a set of corresponding person_ids
-names = {}
+# Co-star graph of every person and movie, filled in by load_data
+graph = None
 
-# Maps person_ids to a dictionary of: name, birth, movies (a set of movie_ids)
-people = {}
+# Binary snapshot of the graph, kept next to the CSV files
+SNAPSHOT = "graph.snapshot"
 
-# Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
-movies = {}
+# Optional landmark distance index, filled in by load_landmarks
+landmarks = None
+
+# Landmark distances snapshot, and how many landmarks to use by default
+LANDMARK_SNAPSHOT = "landmarks.snapshot"
+LANDMARKS = 16
+
+# Search methods shortest_path can use; "alt" needs load_landmarks first
+METHODS = ("bidirectional", "breadth_first", "alt")
+
+# Optional cache of breadth-first search trees, set up by enable_tree_cache
+tree_cache = None
 
 
 def load_data(directory):
     """
     Load data from CSV files into memory.
+
+    The parsed graph is saved as a snapshot next to the CSV files, and
+    later runs memory-map it instead of parsing again. The snapshot is
+    rebuilt whenever a CSV file's size or modification time changes.
     """
-    # Load people
-    with open(f"{directory}/people.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            people[row["id"]] = {
-                "name": row["name"],
-                "birth": row["birth"],
-                "movies": set()
-            }
-            if row["name"].lower() not in names:
-                names[row["name"].lower()] = {row["id"]}
-            else:
-                names[row["name"].lower()].add(row["id"])
-
-    # Load movies
-    with open(f"{directory}/movies.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            movies[row["id"]] = {
-                "title": row["title"],
-                "year": row["year"],
-                "stars": set()
-            }
-
-    # Load stars
-    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            try:
-                people[row["person_id"]]["movies"].add(row["movie_id"])
-                movies[row["movie_id"]]["stars"].add(row["person_id"])
-            except KeyError:
-                pass
+    global graph
+    path = os.path.join(directory, SNAPSHOT)
+    fingerprint = csv_fingerprint(directory)
+
+    graph = read_snapshot(path, fingerprint)
+    if graph is None:
+        graph = Graph.from_csv(directory)
+        try:
+            write_snapshot(graph, path, fingerprint)
+        except OSError:
+            # a read-only dataset still loads, just without the cache
+            pass
+
+
+def enable_tree_cache(budget):
+    """
+    Keep the full search tree of recent sources, up to `budget` bytes,
+    so repeat queries from those people skip the search.
+    """
+    global tree_cache
+    tree_cache = TreeCache(budget)
+
+
+def load_landmarks(directory, count=LANDMARKS):
+    """
+    Load landmark distances for the dataset in `directory`, which
+    distance_bounds and shortest_path's "alt" method use from then on.
+
+    Like the graph itself, the distances are saved next to the CSV
+    files and only recomputed when the CSV files change.
+    """
+    global landmarks
+    path = os.path.join(directory, LANDMARK_SNAPSHOT)
+    fingerprint = csv_fingerprint(directory)
+    fingerprint["landmarks"] = count
+
+    landmarks = Landmarks.read(path, fingerprint)
+    if landmarks is None:
+        landmarks = Landmarks.build(graph, count)
+        try:
+            landmarks.write(path, fingerprint)
+        except OSError:
+            pass
 
 
 def main():
@@ -78,17 +107,101 @@ def main():
         print(f"{degrees} degrees of separation.")
         path = [(None, source)] + path
         for i in range(degrees):
-            person1 = people[path[i][1]]["name"]
-            person2 = people[path[i + 1][1]]["name"]
-            movie = movies[path[i + 1][0]]["title"]
+            person1 = graph.person_names[graph.person_index(path[i][1])]
+            person2 = graph.person_names[graph.person_index(path[i + 1][1])]
+            movie = graph.movie_titles[graph.movie_index(path[i + 1][0])]
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
-def shortest_path(source, target):
+def shortest_path(source, target, method=None):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
+    By default, paths come from cached search trees when the tree cache
+    is enabled, and otherwise the search grows frontiers from both ends
+    at once. Passing `method` always uses that search instead:
+    "bidirectional", "breadth_first" for a single breadth-first search
+    from the source, or "alt" for A* guided by the landmarks from
+    load_landmarks, which is slower than searching from both ends on
+    the benchmark datasets.
+
+    If no possible path, returns None.
+    """
+    if method is not None and method not in METHODS:
+        raise ValueError(f"unknown search method: {method}")
+    if method == "alt" and landmarks is None:
+        raise ValueError("method 'alt' needs load_landmarks() first")
+
+    source = index_for_person(source)
+    target = index_for_person(target)
+
+    # people in different components can never be connected
+    if not graph.connected(source, target):
+        return None
+
+    if method is None and tree_cache is not None:
+        path = tree_cache.path(graph, source, target)
+    elif method == "alt":
+        path = landmarks.search(graph, source, target)
+    elif method == "breadth_first":
+        path = breadth_first_search(source, target)
+    else:
+        path = bidirectional_search(source, target)
+
+    return path_to_ids(path)
+
+
+def all_shortest_paths(source, target):
+    """
+    Yields every shortest list of (movie_id, person_id) pairs that
+    connect the source to the target, one at a time, so callers can
+    stop early or stream them without holding the whole set.
+    """
+    for path in shortest_path_dag(source, target).paths():
+        yield path_to_ids(path)
+
+
+def count_shortest_paths(source, target):
+    """
+    Returns how many shortest paths connect the source to the target,
+    counted over the shortest-path DAG without listing the paths.
+    """
+    return shortest_path_dag(source, target).count()
+
+
+def sample_shortest_path(source, target, rng=random):
+    """
+    Returns one of the shortest paths between the source and target,
+    chosen uniformly at random, or None if they aren't connected.
+    """
+    return path_to_ids(shortest_path_dag(source, target).sample(rng))
+
+
+def shortest_path_dag(source, target):
+    """
+    Returns the ShortestPathDAG between two IMDB person ids.
+    """
+    return ShortestPathDAG(graph, index_for_person(source), index_for_person(target))
+
+
+def path_to_ids(path):
+    """
+    Converts a (movie, person) index path to (movie_id, person_id) pairs.
+    """
+    if path is None:
+        return None
+    return [
+        (graph.movie_ids[movie], graph.person_ids[person])
+        for movie, person in path
+    ]
+
+
+def breadth_first_search(source, target):
+    """
+    Returns the shortest list of (movie, person) index pairs
+    found by a single breadth-first search from the source.
+
     If no possible path, returns None.
     """
     start = Node(state=source, parent=None, action=None)
@@ -106,9 +219,9 @@ def shortest_path(source, target):
         
         explored.add(node.state)
 
-        for movie_id, person_id in neighbors_for_person(node.state):
-            if not frontier.contains_state(person_id) and person_id not in explored:
-                child = Node(state = person_id, parent = node, action = movie_id)
+        for movie, person in graph.neighbors(node.state):
+            if not frontier.contains_state(person) and person not in explored:
+                child = Node(state = person, parent = node, action = movie)
                 if child.state == target:
                     movies = []
                     persons = []
@@ -120,8 +233,113 @@ def shortest_path(source, target):
                     persons.reverse()
                     return list(zip(movies, persons))
                 frontier.add(child)
-    # TODO
-    raise NotImplementedError
+
+
+def distance_bounds(source, target):
+    """
+    Returns (lower, upper) bounds on the degrees of separation between
+    two people without searching, using the loaded landmarks.
+
+    The bounds are equal when the distance is known exactly, and the
+    upper bound is None when no landmark reaches the pair. If the two
+    people aren't connected, returns None.
+    """
+    if landmarks is None:
+        raise ValueError("distance_bounds needs load_landmarks() first")
+    source = index_for_person(source)
+    target = index_for_person(target)
+    if not graph.connected(source, target):
+        return None
+    return landmarks.bounds(source, target)
+
+
+def bidirectional_search(source, target):
+    """
+    Returns the shortest list of (movie, person) index pairs
+    that connect the source to the target by searching from both
+    ends and joining the two searches on the person where they meet.
+
+    If no possible path, returns None.
+    """
+    if source == target:
+        return []
+
+    # each side maps a reached person to the (movie, person) pair
+    # that leads one step back towards the person that side started from
+    forward = {source: None}
+    backward = {target: None}
+    forward_frontier = [source]
+    backward_frontier = [target]
+
+    # a movie only needs expanding once per side, since all of its
+    # stars are reached the first time it is seen
+    forward_movies = set()
+    backward_movies = set()
+
+    while forward_frontier and backward_frontier:
+
+        # always expanding the smaller frontier keeps both searches small
+        if len(forward_frontier) <= len(backward_frontier):
+            forward_frontier, meeting = expand_frontier(
+                forward_frontier, forward, backward, forward_movies
+            )
+        else:
+            backward_frontier, meeting = expand_frontier(
+                backward_frontier, backward, forward, backward_movies
+            )
+
+        if meeting is not None:
+            return join_paths(meeting, forward, backward)
+
+    return None
+
+
+def expand_frontier(frontier, parents, other_parents, seen_movies):
+    """
+    Expands every person of one breadth-first level, recording
+    how each newly reached person was reached in `parents`.
+
+    Returns the next level and the first person that has already been
+    reached by the other search (None if the searches haven't met).
+    """
+    next_frontier = []
+    for person in frontier:
+        for movie in graph.movies_of(person):
+            if movie in seen_movies:
+                continue
+            seen_movies.add(movie)
+            for star in graph.stars_of(movie):
+                if star in parents:
+                    continue
+                parents[star] = (movie, person)
+                if star in other_parents:
+                    return next_frontier, star
+                next_frontier.append(star)
+    return next_frontier, None
+
+
+def join_paths(meeting, forward, backward):
+    """
+    Builds the (movie, person) path from the source to the target
+    through the person where the forward and backward searches met.
+    """
+    # walking back from the meeting person to the source
+    path = []
+    person = meeting
+    while forward[person] is not None:
+        movie, previous = forward[person]
+        path.append((movie, person))
+        person = previous
+    path.reverse()
+
+    # walking on from the meeting person to the target
+    person = meeting
+    while backward[person] is not None:
+        movie, following = backward[person]
+        path.append((movie, following))
+        person = following
+
+    return path
 
 
 def person_id_for_name(name):
@@ -129,38 +347,73 @@ def person_id_for_name(name):
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
     """
-    person_ids = list(names.get(name.lower(), set()))
+    person_ids = [graph.person_ids[person] for person in graph.people_named(name)]
     if len(person_ids) == 0:
-        return None
+        # offering the closest names, so a typo doesn't end the run
+        person_ids = candidates_for_name(name)
+        if len(person_ids) == 0:
+            return None
+        print(f"No one named '{name}'. Did you mean:")
+        return choose_person(person_ids)
     elif len(person_ids) > 1:
         print(f"Which '{name}'?")
-        for person_id in person_ids:
-            person = people[person_id]
-            name = person["name"]
-            birth = person["birth"]
-            print(f"ID: {person_id}, Name: {name}, Birth: {birth}")
-        try:
-            person_id = input("Intended Person ID: ")
-            if person_id in person_ids:
-                return person_id
-        except ValueError:
-            pass
-        return None
+        return choose_person(person_ids)
     else:
         return person_ids[0]
 
 
+def choose_person(person_ids):
+    """
+    Lists people and asks which of them was intended.
+    """
+    for person_id in person_ids:
+        person = graph.person_index(person_id)
+        name = graph.person_names[person]
+        birth = graph.person_births[person]
+        print(f"ID: {person_id}, Name: {name}, Birth: {birth}")
+    try:
+        person_id = input("Intended Person ID: ")
+        if person_id in person_ids:
+            return person_id
+    except ValueError:
+        pass
+    return None
+
+
+def candidates_for_name(name, limit=10):
+    """
+    Returns up to `limit` IMDB ids of people whose names are close to
+    `name`: names starting with it first, then the best fuzzy matches.
+    """
+    people = graph.people_with_prefix(name, limit)
+    for person, _ in graph.people_like(name, limit):
+        if len(people) >= limit:
+            break
+        if person not in people:
+            people.append(person)
+    return [graph.person_ids[person] for person in people]
+
+
+def index_for_person(person_id):
+    """
+    Returns the graph index for an IMDB person id,
+    raising KeyError for unknown ids.
+    """
+    person = graph.person_index(person_id)
+    if person is None:
+        raise KeyError(person_id)
+    return person
+
+
 def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
-    movie_ids = people[person_id]["movies"]
-    neighbors = set()
-    for movie_id in movie_ids:
-        for person_id in movies[movie_id]["stars"]:
-            neighbors.add((movie_id, person_id))
-    return neighbors
+    return {
+        (graph.movie_ids[movie], graph.person_ids[person])
+        for movie, person in graph.neighbors(index_for_person(person_id))
+    }
 
 
 if __name__ == "__main__":
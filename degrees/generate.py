@@ -0,0 +1,118 @@
+import csv
+import math
+import os
+import random
+import sys
+
+# Movies generated per person, roughly the ratio in the IMDB dataset
+MOVIES_PER_PERSON = 0.35
+
+# Cast sizes follow a Pareto distribution with this shape, capped at MAX_CAST
+CAST_SHAPE = 1.3
+MAX_CAST = 250
+
+# Higher skew concentrates roles on fewer, more famous people
+POPULARITY_SKEW = 2.5
+
+SYLLABLES = [
+    "al", "an", "ar", "bel", "ber", "ca", "da", "del", "el", "en", "fa",
+    "ga", "ha", "is", "ja", "ka", "la", "li", "lo", "ma", "mi", "na",
+    "ni", "no", "or", "pa", "ra", "ri", "ro", "sa", "se", "ta", "to",
+    "va", "vi", "wa", "yo", "za"
+]
+
+WORDS = [
+    "night", "day", "last", "first", "city", "love", "war", "river",
+    "king", "dark", "house", "road", "star", "secret", "summer", "winter",
+    "blood", "glass", "silent", "golden", "lost", "return", "empire", "storm"
+]
+
+
+def main():
+    if len(sys.argv) not in [3, 4]:
+        sys.exit("Usage: python generate.py directory people [seed]")
+
+    # Parse command-line arguments
+    directory = sys.argv[1]
+    num_people = int(sys.argv[2])
+    seed = int(sys.argv[3]) if len(sys.argv) == 4 else None
+
+    generate(directory, num_people, seed)
+
+
+def generate(directory, num_people, seed=None):
+    """
+    Write people.csv, movies.csv and stars.csv for a synthetic dataset
+    with `num_people` people into `directory`.
+
+    Cast sizes are heavy-tailed and a few people appear in many movies
+    while most appear in one or none, so the graph has a giant component,
+    many small ones and a long tail of isolated people, like IMDB.
+    """
+    rng = random.Random(seed)
+    num_movies = max(1, int(num_people * MOVIES_PER_PERSON))
+    os.makedirs(directory, exist_ok=True)
+
+    # Write people
+    with open(os.path.join(directory, "people.csv"), "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f, quoting=csv.QUOTE_NONNUMERIC)
+        writer.writerow(["id", "name", "birth"])
+        for person in range(num_people):
+            birth = rng.randint(1900, 2005) if rng.random() < 0.8 else ""
+            writer.writerow([person + 1, person_name(rng), birth])
+
+    # Write movies
+    with open(os.path.join(directory, "movies.csv"), "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f, quoting=csv.QUOTE_NONNUMERIC)
+        writer.writerow(["id", "title", "year"])
+        for movie in range(num_movies):
+            writer.writerow([movie + 1, movie_title(rng), rng.randint(1920, 2020)])
+
+    # Write stars, spreading popularity over ids with a multiplicative
+    # permutation so famous people aren't simply the lowest ids
+    stride = coprime_stride(num_people, rng)
+    with open(os.path.join(directory, "stars.csv"), "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["person_id", "movie_id"])
+        for movie in range(num_movies):
+            cast = set()
+            for _ in range(cast_size(rng)):
+                rank = int(num_people * rng.random() ** POPULARITY_SKEW)
+                cast.add(rank * stride % num_people)
+            for person in cast:
+                writer.writerow([person + 1, movie + 1])
+
+
+def cast_size(rng):
+    """
+    Returns a heavy-tailed number of stars for one movie.
+    """
+    return min(MAX_CAST, int(rng.paretovariate(CAST_SHAPE)))
+
+
+def coprime_stride(n, rng):
+    """
+    Returns a multiplier that permutes 0..n-1 when taken modulo n.
+    """
+    while True:
+        stride = rng.randrange(1, max(2, n))
+        if math.gcd(stride, n) == 1:
+            return stride
+
+
+def person_name(rng):
+    """
+    Returns a made-up name; a small syllable pool means common names
+    repeat, which exercises ambiguous name lookups.
+    """
+    first = "".join(rng.choices(SYLLABLES, k=rng.randint(2, 3))).capitalize()
+    last = "".join(rng.choices(SYLLABLES, k=rng.randint(2, 4))).capitalize()
+    return f"{first} {last}"
+
+
+def movie_title(rng):
+    return " ".join(rng.choices(WORDS, k=rng.randint(1, 4))).title()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,542 @@
+import csv
+import heapq
+import json
+import math
+import mmap
+import os
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter
+
+# File names that make up a dataset directory
+CSV_FILES = ("people.csv", "movies.csv", "stars.csv")
+
+# Leading bytes of a graph snapshot file
+SNAPSHOT_MAGIC = b"DEGRSNAP"
+
+# Share of a query's uncommon trigrams a name needs before it counts as a fuzzy match
+FUZZY_OVERLAP = 0.5
+
+# Share of names a trigram can appear in before fuzzy matching ignores
+# it when looking for candidates, and the fewest names that can make a
+# trigram common, so small datasets match on all of them
+FUZZY_COMMON = 0.05
+FUZZY_COMMON_MIN = 1000
+
+# Fuzzy candidates scored exactly for each match returned
+FUZZY_SHORTLIST = 10
+
+# How many times longer than the remaining fuzzy candidates a posting
+# list must be before probing it per candidate beats scanning it
+FUZZY_SCAN_RATIO = 16
+
+
+class StringTable():
+    """
+    Stores many strings back to back in a single UTF-8 buffer, with an
+    offsets array marking where each string starts and ends.
+    """
+    def __init__(self, blob, offsets):
+        self.blob = blob
+        self.offsets = offsets
+
+    @classmethod
+    def build(cls, strings):
+        blob = bytearray()
+        offsets = array("i", [0])
+        for string in strings:
+            blob += string.encode("utf-8")
+            offsets.append(len(blob))
+        return cls(bytes(blob), offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        return str(self.blob[self.offsets[index]:self.offsets[index + 1]], "utf-8")
+
+
+class Graph():
+    """
+    Co-star graph with people and movies numbered densely from 0.
+
+    People and movies are sorted by IMDB id, so an id is found by binary
+    search over the id tables. Person -> movie and movie -> person
+    adjacency live in CSR form: the movies of person `p` are
+    `person_movies[person_offsets[p]:person_offsets[p + 1]]`, and the
+    stars of a movie are laid out the same way.
+    """
+
+    # Attributes that are StringTables and plain int arrays respectively,
+    # which is everything a snapshot has to store
+    STRING_TABLES = (
+        "person_ids", "person_names", "person_births",
+        "movie_ids", "movie_titles", "movie_years", "grams"
+    )
+    ARRAYS = (
+        "person_offsets", "person_movies",
+        "movie_offsets", "movie_people", "name_order",
+        "components", "component_sizes", "gram_offsets", "gram_people"
+    )
+
+    def __init__(self, person_ids, person_names, person_births,
+                 movie_ids, movie_titles, movie_years,
+                 person_offsets, person_movies,
+                 movie_offsets, movie_people, name_order,
+                 components, component_sizes,
+                 grams, gram_offsets, gram_people):
+        self.person_ids = person_ids
+        self.person_names = person_names
+        self.person_births = person_births
+        self.movie_ids = movie_ids
+        self.movie_titles = movie_titles
+        self.movie_years = movie_years
+        self.person_offsets = person_offsets
+        self.person_movies = person_movies
+        self.movie_offsets = movie_offsets
+        self.movie_people = movie_people
+
+        # person indices sorted by lowercase name, for name lookups
+        self.name_order = name_order
+
+        # connected component of each person, and the size of each component
+        self.components = components
+        self.component_sizes = component_sizes
+
+        # sorted name trigrams, each with the people whose names contain
+        # it in CSR form, for fuzzy name lookups
+        self.grams = grams
+        self.gram_offsets = gram_offsets
+        self.gram_people = gram_people
+
+    @classmethod
+    def from_csv(cls, directory):
+        """
+        Build a graph from the people, movies and stars CSV files
+        in `directory`.
+        """
+        # Load people
+        with open(f"{directory}/people.csv", encoding="utf-8") as f:
+            people = sorted(
+                (row["id"], row["name"], row["birth"])
+                for row in csv.DictReader(f)
+            )
+        person_index = {row[0]: i for i, row in enumerate(people)}
+
+        # Load movies
+        with open(f"{directory}/movies.csv", encoding="utf-8") as f:
+            movies = sorted(
+                (row["id"], row["title"], row["year"])
+                for row in csv.DictReader(f)
+            )
+        movie_index = {row[0]: i for i, row in enumerate(movies)}
+
+        # Load stars, encoding each (person, movie) pair as one integer
+        # so duplicate rows collapse and sorting groups them by person
+        num_movies = len(movies)
+        edges = set()
+        with open(f"{directory}/stars.csv", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                try:
+                    person = person_index[row["person_id"]]
+                    movie = movie_index[row["movie_id"]]
+                except KeyError:
+                    continue
+                edges.add(person * num_movies + movie)
+        edges = sorted(edges)
+        del person_index, movie_index
+
+        # person -> movie adjacency comes straight out of the sorted edges
+        person_offsets = array("i", [0]) * (len(people) + 1)
+        person_movies = array("i", [0]) * len(edges)
+        movie_counts = array("i", [0]) * (num_movies + 1)
+        for i, edge in enumerate(edges):
+            person, movie = divmod(edge, num_movies)
+            person_offsets[person + 1] += 1
+            person_movies[i] = movie
+            movie_counts[movie + 1] += 1
+        for i in range(len(people)):
+            person_offsets[i + 1] += person_offsets[i]
+
+        # movie -> person adjacency is filled in by counting sort
+        for i in range(num_movies):
+            movie_counts[i + 1] += movie_counts[i]
+        movie_offsets = array("i", movie_counts)
+        movie_people = array("i", [0]) * len(edges)
+        for person in range(len(people)):
+            for i in range(person_offsets[person], person_offsets[person + 1]):
+                movie = person_movies[i]
+                movie_people[movie_counts[movie]] = person
+                movie_counts[movie] += 1
+        del edges, movie_counts
+
+        name_order = array("i", sorted(
+            range(len(people)), key=lambda i: people[i][1].lower()
+        ))
+        components, component_sizes = find_components(
+            len(people), movie_offsets, movie_people
+        )
+
+        gram_lists = {}
+        for person, row in enumerate(people):
+            for gram in trigrams(row[1]):
+                gram_lists.setdefault(gram, array("i")).append(person)
+        grams = sorted(gram_lists)
+        gram_offsets = array("i", [0])
+        gram_people = array("i")
+        for gram in grams:
+            gram_people.extend(gram_lists[gram])
+            gram_offsets.append(len(gram_people))
+        del gram_lists
+
+        return cls(
+            StringTable.build(row[0] for row in people),
+            StringTable.build(row[1] for row in people),
+            StringTable.build(row[2] for row in people),
+            StringTable.build(row[0] for row in movies),
+            StringTable.build(row[1] for row in movies),
+            StringTable.build(row[2] for row in movies),
+            person_offsets, person_movies,
+            movie_offsets, movie_people, name_order,
+            components, component_sizes,
+            StringTable.build(grams), gram_offsets, gram_people
+        )
+
+    @property
+    def num_people(self):
+        return len(self.person_offsets) - 1
+
+    @property
+    def num_movies(self):
+        return len(self.movie_offsets) - 1
+
+    def person_index(self, person_id):
+        """
+        Returns the dense index for an IMDB person id, or None.
+        """
+        return find(self.person_ids, person_id)
+
+    def movie_index(self, movie_id):
+        """
+        Returns the dense index for an IMDB movie id, or None.
+        """
+        return find(self.movie_ids, movie_id)
+
+    def people_named(self, name):
+        """
+        Returns the indices of every person whose name matches
+        `name`, ignoring case.
+        """
+        name = name.lower()
+        names = self.person_names
+        key = lambda person: names[person].lower()
+        start = bisect_left(self.name_order, name, key=key)
+        end = bisect_right(self.name_order, name, lo=start, key=key)
+        return list(self.name_order[start:end])
+
+    def people_with_prefix(self, prefix, limit=None):
+        """
+        Returns the indices of people whose name starts with `prefix`,
+        ignoring case, in name order and at most `limit` of them.
+        """
+        prefix = prefix.lower()
+        names = self.person_names
+        key = lambda person: names[person].lower()[:len(prefix)]
+        start = bisect_left(self.name_order, prefix, key=key)
+        end = bisect_right(self.name_order, prefix, lo=start, key=key)
+        if limit is not None:
+            end = min(end, start + limit)
+        return list(self.name_order[start:end])
+
+    def people_like(self, name, limit=10):
+        """
+        Returns up to `limit` (person, score) pairs for the people whose
+        names share the most trigrams with `name`, best first, where the
+        score is the Dice similarity of the two trigram sets.
+        """
+        query = trigrams(name)
+        if not query:
+            return []
+
+        postings = []
+        for gram in query:
+            index = find(self.grams, gram)
+            if index is not None:
+                postings.append((self.gram_offsets[index], self.gram_offsets[index + 1]))
+        if not postings:
+            return []
+        postings.sort(key=lambda bounds: bounds[1] - bounds[0])
+
+        # trigrams in more than FUZZY_COMMON of names barely tell names
+        # apart, so candidates are matched on the rarer ones alone (on the
+        # rarest, if all are common) and the rest only count in the score
+        common = max(FUZZY_COMMON * len(self.person_ids), FUZZY_COMMON_MIN)
+        postings = [
+            (start, end) for start, end in postings if end - start <= common
+        ] or postings[:1]
+
+        # a name sharing at least `needed` of those trigrams must contain
+        # one of the rarest len(postings) - needed + 1 of them, so only
+        # people in those posting lists can match at all
+        needed = max(1, math.ceil(len(postings) * FUZZY_OVERLAP))
+        rare = len(postings) - needed + 1
+
+        shared = Counter()
+        for start, end in postings[:rare]:
+            shared.update(self.gram_people[start:end])
+
+        # the longer lists are only checked for candidates that can still
+        # reach `needed`, and once those are few enough a list is binary
+        # searched for each of them instead of scanned
+        for i, (start, end) in enumerate(postings[rare:]):
+            remaining = len(postings) - rare - i
+            if needed - remaining > 1:
+                shared = Counter({
+                    person: count for person, count in shared.items()
+                    if count + remaining >= needed
+                })
+            if len(shared) * FUZZY_SCAN_RATIO < end - start:
+                found = [
+                    person for person in shared
+                    if contains(self.gram_people, person, start, end)
+                ]
+            else:
+                found = set(shared).intersection(self.gram_people[start:end])
+            shared.update(found)
+
+        # only the names with the most shared trigrams are worth decoding
+        # to compute their exact similarity over all the query's trigrams
+        scored = []
+        for person, count in shared.most_common(limit * FUZZY_SHORTLIST):
+            if count < needed:
+                break
+            name_grams = trigrams(self.person_names[person])
+            scored.append((2 * len(query & name_grams) / (len(query) + len(name_grams)), person))
+        best = heapq.nlargest(limit, scored)
+        return [(person, score) for score, person in best]
+
+    def connected(self, source, target):
+        """
+        Returns whether any path at all joins two people.
+        """
+        return self.components[source] == self.components[target]
+
+    def component_stats(self):
+        """
+        Returns a summary of the connected components, for diagnostics.
+        """
+        sizes = sorted(self.component_sizes, reverse=True)
+        return {
+            "components": len(sizes),
+            "largest": sizes[0] if sizes else 0,
+            "isolated": sum(1 for size in sizes if size == 1),
+            "top_sizes": sizes[:10]
+        }
+
+    def movies_of(self, person):
+        return self.person_movies[self.person_offsets[person]:self.person_offsets[person + 1]]
+
+    def stars_of(self, movie):
+        return self.movie_people[self.movie_offsets[movie]:self.movie_offsets[movie + 1]]
+
+    def neighbors(self, person):
+        """
+        Yields (movie, person) index pairs for people
+        who starred with a given person.
+        """
+        for movie in self.movies_of(person):
+            for star in self.stars_of(movie):
+                yield movie, star
+
+
+def trigrams(name):
+    """
+    Returns the set of three-letter substrings of a lowercased name,
+    padded with spaces so the first and last letters count too.
+    """
+    name = f"  {name.lower()} "
+    return {name[i:i + 3] for i in range(len(name) - 2)}
+
+
+def find(table, key):
+    """
+    Returns the position of `key` in a sorted StringTable, or None.
+    """
+    index = bisect_left(range(len(table)), key, key=table.__getitem__)
+    if index < len(table) and table[index] == key:
+        return index
+    return None
+
+
+def contains(postings, person, start, end):
+    """
+    Returns whether the sorted run postings[start:end] holds `person`.
+    """
+    index = bisect_left(postings, person, start, end)
+    return index < end and postings[index] == person
+
+
+def find_components(num_people, movie_offsets, movie_people):
+    """
+    Label every person with a connected component using union-find,
+    joining all the stars of each movie.
+
+    Returns the component of each person, numbered densely from 0,
+    and the number of people in each component.
+    """
+    parents = array("i", range(num_people))
+
+    def root(person):
+        # path halving keeps the trees shallow without recursion
+        while parents[person] != person:
+            parents[person] = parents[parents[person]]
+            person = parents[person]
+        return person
+
+    for movie in range(len(movie_offsets) - 1):
+        start, end = movie_offsets[movie], movie_offsets[movie + 1]
+        if end - start < 2:
+            continue
+        first = root(movie_people[start])
+        for i in range(start + 1, end):
+            other = root(movie_people[i])
+            if other != first:
+                parents[other] = first
+
+    components = array("i", [0]) * num_people
+    component_sizes = array("i")
+    labels = {}
+    for person in range(num_people):
+        person_root = root(person)
+        if person_root not in labels:
+            labels[person_root] = len(component_sizes)
+            component_sizes.append(0)
+        components[person] = labels[person_root]
+        component_sizes[labels[person_root]] += 1
+    return components, component_sizes
+
+
+def csv_fingerprint(directory):
+    """
+    Returns the size and modification time of each CSV file in
+    `directory`, which decides whether a snapshot is still current.
+    """
+    fingerprint = {}
+    for filename in CSV_FILES:
+        stat = os.stat(os.path.join(directory, filename))
+        fingerprint[filename] = [stat.st_size, stat.st_mtime_ns]
+    return fingerprint
+
+
+def write_snapshot(graph, path, fingerprint):
+    """
+    Write every array of `graph` to a binary snapshot at `path`.
+    """
+    buffers = []
+    for name in Graph.STRING_TABLES:
+        table = getattr(graph, name)
+        buffers.append((f"{name}.blob", "B", table.blob))
+        buffers.append((f"{name}.offsets", "i", table.offsets))
+    for name in Graph.ARRAYS:
+        buffers.append((name, "i", getattr(graph, name)))
+    write_sections(path, fingerprint, buffers)
+
+
+def read_snapshot(path, fingerprint):
+    """
+    Memory-map the snapshot at `path` and return a Graph backed by it.
+
+    Returns None if there is no usable snapshot.
+    """
+    sections = read_sections(path, fingerprint)
+    if sections is None:
+        return None
+
+    # snapshots written before a section existed have to be rebuilt
+    required = [
+        f"{name}.{part}" for name in Graph.STRING_TABLES for part in ("blob", "offsets")
+    ] + list(Graph.ARRAYS)
+    if any(name not in sections for name in required):
+        return None
+
+    fields = {}
+    for name in Graph.STRING_TABLES:
+        fields[name] = StringTable(
+            sections[f"{name}.blob"], sections[f"{name}.offsets"]
+        )
+    for name in Graph.ARRAYS:
+        fields[name] = sections[name]
+    return Graph(**fields)
+
+
+def write_sections(path, fingerprint, buffers):
+    """
+    Write (name, typecode, buffer) sections to a snapshot file at `path`.
+
+    The file is a magic string, a length-prefixed JSON header describing
+    each section, and then the raw section buffers aligned to 8 bytes.
+    """
+    sections = {}
+    position = 0
+    for name, typecode, buffer in buffers:
+        size = memoryview(buffer).nbytes
+        sections[name] = [typecode, position, size]
+        position += size + (-size % 8)
+
+    header = json.dumps({
+        "byteorder": sys.byteorder,
+        "fingerprint": fingerprint,
+        "sections": sections
+    }).encode("utf-8")
+    header += b" " * (-len(header) % 8)
+
+    # writing to a temporary file first so a reader never maps half a file
+    temporary = f"{path}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(SNAPSHOT_MAGIC)
+        f.write(len(header).to_bytes(8, "little"))
+        f.write(header)
+        for name, typecode, buffer in buffers:
+            size = memoryview(buffer).nbytes
+            f.write(buffer)
+            f.write(b"\0" * (-size % 8))
+    os.replace(temporary, path)
+
+
+def read_sections(path, fingerprint):
+    """
+    Memory-map the snapshot file at `path` and return its sections
+    as a dictionary of typed memoryviews.
+
+    Returns None if there is no snapshot, if it is truncated or corrupt,
+    or if it was written on a machine with a different byte order or for
+    a different fingerprint.
+    """
+    try:
+        with open(path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    view = memoryview(buffer)
+    if bytes(view[:8]) != SNAPSHOT_MAGIC:
+        return None
+
+    # a truncated or corrupt snapshot is treated like a missing one,
+    # so the caller rebuilds it from the CSV files
+    try:
+        header_size = int.from_bytes(view[8:16], "little")
+        header = json.loads(str(view[16:16 + header_size], "utf-8"))
+        if header["byteorder"] != sys.byteorder or header["fingerprint"] != fingerprint:
+            return None
+
+        start = 16 + header_size
+        sections = {}
+        for name, (typecode, offset, size) in header["sections"].items():
+            if start + offset + size > len(view):
+                return None
+            sections[name] = view[start + offset:start + offset + size].cast(typecode)
+    except (ValueError, KeyError, TypeError):
+        return None
+    return sections
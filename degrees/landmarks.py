@@ -0,0 +1,176 @@
+import heapq
+from array import array
+
+from graph import read_sections, write_sections
+
+
+class Landmarks():
+    """
+    Breadth-first distances from a few well-connected people
+    ("landmarks") to everyone else in the graph.
+
+    By the triangle inequality, for any landmark L the distance between
+    two people s and t lies between |d(L, s) - d(L, t)| and
+    d(L, s) + d(L, t), which bounds distances without any search and
+    gives an admissible heuristic for A* (the ALT algorithm).
+    """
+    def __init__(self, people, distances):
+        self.people = people
+
+        # one array per landmark, -1 where a person can't be reached
+        self.distances = distances
+
+    @classmethod
+    def build(cls, graph, count=16, people=None):
+        """
+        Build distance arrays from `people`, or from the `count`
+        people who appeared in the most movies.
+        """
+        if people is None:
+            people = heapq.nlargest(
+                count, range(graph.num_people),
+                key=lambda person: graph.person_offsets[person + 1] - graph.person_offsets[person]
+            )
+        return cls(
+            array("i", people),
+            [bfs_distances(graph, person) for person in people]
+        )
+
+    @classmethod
+    def read(cls, path, fingerprint):
+        """
+        Memory-map landmark distances saved by `write`,
+        or return None if there are none for `fingerprint`.
+        """
+        sections = read_sections(path, fingerprint)
+        if sections is None or "people" not in sections:
+            return None
+        people = sections["people"]
+        names = [f"distances.{i}" for i in range(len(people))]
+        if any(name not in sections for name in names):
+            return None
+        return cls(people, [sections[name] for name in names])
+
+    def write(self, path, fingerprint):
+        buffers = [("people", "i", self.people)]
+        for i, distances in enumerate(self.distances):
+            buffers.append((f"distances.{i}", "h", distances))
+        write_sections(path, fingerprint, buffers)
+
+    def bounds(self, source, target):
+        """
+        Returns (lower, upper) bounds on the number of movies between
+        two people in the same component. The upper bound is None if
+        no landmark reaches them.
+        """
+        if source == target:
+            return 0, 0
+        lower, upper = 1, None
+        for distances in self.distances:
+            source_distance = distances[source]
+            target_distance = distances[target]
+            if source_distance < 0 or target_distance < 0:
+                continue
+            lower = max(lower, abs(source_distance - target_distance))
+            if upper is None or source_distance + target_distance < upper:
+                upper = source_distance + target_distance
+        return lower, upper
+
+    def search(self, graph, source, target):
+        """
+        Returns the shortest list of (movie, person) index pairs that
+        connect two people in the same component, using A* guided by
+        landmark lower bounds and pruned by the landmark upper bound.
+
+        If no possible path, returns None.
+        """
+        if source == target:
+            return []
+
+        # only landmarks that reach the target say anything about it
+        guides = [
+            (distances, distances[target]) for distances in self.distances
+            if distances[target] >= 0
+        ]
+
+        def heuristic(person):
+            best = 0
+            for distances, target_distance in guides:
+                estimate = abs(distances[person] - target_distance)
+                if estimate > best:
+                    best = estimate
+            return best
+
+        _, upper = self.bounds(source, target)
+
+        depths = {source: 0}
+        parents = {source: None}
+
+        # shallowest depth each movie was expanded from; a movie only
+        # needs expanding again if reached from a shallower person
+        movie_depths = {}
+
+        # ties on estimated length go to the deeper person, which
+        # heads straight for the target instead of widening the search
+        frontier = [(heuristic(source), 0, source)]
+
+        while frontier:
+            _, depth, person = heapq.heappop(frontier)
+            depth = -depth
+            if depth > depths[person]:
+                continue
+
+            if person == target:
+                path = []
+                while parents[person] is not None:
+                    movie, previous = parents[person]
+                    path.append((movie, person))
+                    person = previous
+                path.reverse()
+                return path
+
+            for movie in graph.movies_of(person):
+                if movie_depths.get(movie, depth + 1) <= depth:
+                    continue
+                movie_depths[movie] = depth
+                for star in graph.stars_of(movie):
+                    if depth + 1 >= depths.get(star, depth + 2):
+                        continue
+                    estimate = depth + 1 + heuristic(star)
+
+                    # no shortest path can run through this person
+                    if upper is not None and estimate > upper:
+                        continue
+
+                    depths[star] = depth + 1
+                    parents[star] = (movie, person)
+                    heapq.heappush(frontier, (estimate, -(depth + 1), star))
+
+        return None
+
+
+def bfs_distances(graph, source):
+    """
+    Returns the number of movies between `source` and every person,
+    with -1 for people that can't be reached.
+    """
+    distances = array("h", [-1]) * graph.num_people
+    seen_movies = bytearray(graph.num_movies)
+    distances[source] = 0
+
+    frontier = [source]
+    depth = 0
+    while frontier:
+        depth += 1
+        next_frontier = []
+        for person in frontier:
+            for movie in graph.movies_of(person):
+                if seen_movies[movie]:
+                    continue
+                seen_movies[movie] = 1
+                for star in graph.stars_of(movie):
+                    if distances[star] < 0:
+                        distances[star] = depth
+                        next_frontier.append(star)
+        frontier = next_frontier
+    return distances
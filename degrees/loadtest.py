@@ -0,0 +1,92 @@
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from client import DegreesClient
+from server import PORT
+
+
+def main():
+    if len(sys.argv) not in [2, 3, 4]:
+        sys.exit("Usage: python loadtest.py pairs [concurrency] [port]")
+    concurrency = int(sys.argv[2]) if len(sys.argv) >= 3 else 8
+    port = int(sys.argv[3]) if len(sys.argv) == 4 else PORT
+
+    with open(sys.argv[1], encoding="utf-8") as f:
+        pairs = [
+            line.rstrip("\r\n").split("\t")
+            for line in f if line.count("\t") == 1
+        ]
+
+    report = run(pairs, concurrency, port)
+    print(json.dumps(report, indent=2))
+
+
+def run(pairs, concurrency, port=PORT):
+    """
+    Sends every (source, target) pair to the server from `concurrency`
+    threads at once, and returns a report of client-side and
+    server-side latencies in milliseconds.
+    """
+    # splitting the pairs evenly so each thread keeps one connection
+    shards = [pairs[i::concurrency] for i in range(concurrency)]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as executor:
+        results = list(executor.map(lambda shard: send(shard, port), shards))
+    elapsed = time.perf_counter() - start
+
+    client_latencies = sorted(l for shard in results for l, _ in shard)
+    server_latencies = sorted(l for shard in results for _, l in shard)
+    return {
+        "requests": len(client_latencies),
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 3),
+        "requests_per_second": round(len(client_latencies) / elapsed, 1),
+        "client_ms": summarize(client_latencies),
+        "server_ms": summarize(server_latencies)
+    }
+
+
+def send(pairs, port):
+    """
+    Sends pairs over one connection, returning a
+    (client latency, server latency) tuple for each.
+    """
+    client = DegreesClient(port=port)
+    latencies = []
+    for source, target in pairs:
+        start = time.perf_counter()
+        result = client.shortest_path(source, target)
+        latency = (time.perf_counter() - start) * 1000
+        latencies.append((latency, result["latency_ms"]))
+    client.close()
+    return latencies
+
+
+def summarize(latencies):
+    """
+    Returns the mean and p50/p90/p99/max of sorted latencies.
+    """
+    if not latencies:
+        return {}
+    return {
+        "mean": round(sum(latencies) / len(latencies), 3),
+        "p50": round(percentile(latencies, 50), 3),
+        "p90": round(percentile(latencies, 90), 3),
+        "p99": round(percentile(latencies, 99), 3),
+        "max": round(latencies[-1], 3)
+    }
+
+
+def percentile(latencies, p):
+    """
+    Returns the `p`th percentile of sorted latencies, by nearest rank.
+    """
+    rank = max(1, -(-len(latencies) * p // 100))
+    return latencies[int(rank) - 1]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+import json
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import degrees
+from batch import answer_pair
+
+HOST = "127.0.0.1"
+PORT = 8050
+
+
+def main():
+    if len(sys.argv) not in [2, 3]:
+        sys.exit("Usage: python server.py directory [port]")
+    directory = sys.argv[1]
+    port = int(sys.argv[2]) if len(sys.argv) == 3 else PORT
+
+    # Load data from files into memory, once for every request
+    print("Loading data...")
+    degrees.load_data(directory)
+    print("Data loaded.")
+
+    server = ThreadingHTTPServer((HOST, port), QueryHandler)
+    print(f"Serving on http://{HOST}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    """
+    Answers queries against the loaded graph as JSON:
+
+        GET /path?source=...&target=...   shortest path between two people
+        GET /person?name=...              IMDB ids of everyone with a name
+
+    Every response carries the time spent answering it in "latency_ms".
+    """
+    protocol_version = "HTTP/1.1"
+
+    # headers and body go out as separate writes, which Nagle's algorithm
+    # would otherwise hold back for a delayed ACK on kept-alive connections
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        start = time.perf_counter()
+        url = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+
+        if url.path == "/path" and "source" in query and "target" in query:
+            status, result = 200, answer_pair(query["source"], query["target"])
+        elif url.path == "/person" and "name" in query:
+            status, result = 200, {
+                "name": query["name"],
+                "person_ids": [
+                    degrees.graph.person_ids[person]
+                    for person in degrees.graph.people_named(query["name"])
+                ]
+            }
+        else:
+            status, result = 404, {"error": f"unknown request: {self.path}"}
+
+        latency = (time.perf_counter() - start) * 1000
+        result["latency_ms"] = round(latency, 3)
+        body = json.dumps(result).encode("utf-8")
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_request(self, code="-", size="-"):
+        # the latency is already in the body; keep the console quiet
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+from array import array
+from collections import OrderedDict
+
+
+class TreeCache():
+    """
+    Least-recently-used cache of complete breadth-first search trees,
+    keyed by the person each search started from.
+
+    Since co-starring is symmetric, a tree answers every query that has
+    its root at either end, by walking parent pointers from the other end.
+    """
+    def __init__(self, budget):
+        # most memory the cached trees may take up, in bytes
+        self.budget = budget
+        self.size = 0
+        self.trees = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def path(self, graph, source, target):
+        """
+        Returns the shortest list of (movie, person) index pairs
+        that connect two people, searching only on a cache miss.
+
+        If no possible path, returns None.
+        """
+        if source in self.trees:
+            self.hits += 1
+            self.trees.move_to_end(source)
+            return walk(self.trees[source], source, target)
+
+        if target in self.trees:
+            self.hits += 1
+            self.trees.move_to_end(target)
+            path = walk(self.trees[target], target, source)
+            return None if path is None else reverse(path, target)
+
+        self.misses += 1
+        tree = bfs_tree(graph, source)
+        self.store(source, tree)
+        return walk(tree, source, target)
+
+    def store(self, source, tree):
+        size = sum(parents.itemsize * len(parents) for parents in tree)
+        if size > self.budget:
+            return
+        while self.size + size > self.budget:
+            _, evicted = self.trees.popitem(last=False)
+            self.size -= sum(parents.itemsize * len(parents) for parents in evicted)
+            self.evictions += 1
+        self.trees[source] = tree
+        self.size += size
+
+    def stats(self):
+        """
+        Returns hit, miss and eviction counts along with
+        the number and total size of cached trees.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "trees": len(self.trees),
+            "bytes": self.size,
+            "budget": self.budget
+        }
+
+
+def bfs_tree(graph, source):
+    """
+    Runs a breadth-first search over the whole component of `source`.
+
+    Returns (parent_people, parent_movies) arrays giving, for each
+    person, the previous person on a shortest path from the source and
+    the movie joining them; -1 for the source and unreached people.
+    """
+    parent_people = array("i", [-1]) * graph.num_people
+    parent_movies = array("i", [-1]) * graph.num_people
+    seen_movies = bytearray(graph.num_movies)
+
+    # the source is its own parent while searching, so it counts as reached
+    parent_people[source] = source
+
+    frontier = [source]
+    while frontier:
+        next_frontier = []
+        for person in frontier:
+            for movie in graph.movies_of(person):
+                if seen_movies[movie]:
+                    continue
+                seen_movies[movie] = 1
+                for star in graph.stars_of(movie):
+                    if parent_people[star] < 0:
+                        parent_people[star] = person
+                        parent_movies[star] = movie
+                        next_frontier.append(star)
+        frontier = next_frontier
+
+    parent_people[source] = -1
+    return parent_people, parent_movies
+
+
+def walk(tree, root, target):
+    """
+    Follows parent pointers from `target` back to the `root` of `tree`,
+    returning the (movie, person) path from the root to the target,
+    or None if the tree never reached the target.
+    """
+    parent_people, parent_movies = tree
+    path = []
+    person = target
+    while person != root:
+        if parent_people[person] < 0:
+            return None
+        path.append((parent_movies[person], person))
+        person = parent_people[person]
+    path.reverse()
+    return path
+
+
+def reverse(path, start):
+    """
+    Reverses a (movie, person) path that begins at person `start`.
+    """
+    people = [start] + [person for _, person in path[:-1]]
+    movies = [movie for movie, _ in path]
+    return list(zip(reversed(movies), reversed(people)))
@@ -0,0 +1,238 @@
+import heapq
+
+import numpy as np
+
+# Gene counts, in the order they index each factor's axes
+GENES = (0, 1, 2)
+
+
+class Factor():
+    """
+    A table of non-negative values over the gene counts of some people,
+    with one axis of length 3 for each name in `variables`.
+    """
+    def __init__(self, variables, table):
+        self.variables = tuple(variables)
+        self.table = table
+
+    def multiply(self, other):
+        """
+        Return the product of two factors, over the union of their variables.
+        """
+        variables = self.variables + tuple(v for v in other.variables if v not in self.variables)
+        axes = {variable: i for i, variable in enumerate(variables)}
+        table = np.einsum(
+            self.table, [axes[v] for v in self.variables],
+            other.table, [axes[v] for v in other.variables],
+            list(range(len(variables)))
+        )
+        return Factor(variables, table)
+
+    def marginal(self, variables):
+        """
+        Return this factor summed over everything but `variables`.
+        """
+        keep = [v for v in self.variables if v in variables]
+        drop = tuple(i for i, v in enumerate(self.variables) if v not in variables)
+        return Factor(keep, self.table.sum(axis=drop))
+
+    def normalized(self):
+        """
+        Return the factor scaled to sum to 1, so long products of
+        small probabilities don't underflow.
+        """
+        total = self.table.sum()
+        return Factor(self.variables, self.table / total if total > 0 else self.table)
+
+
+def product(factors, variables=()):
+    """
+    Return the product of `factors`, or a factor of ones over
+    `variables` if there are none.
+    """
+    result = Factor(variables, np.ones((len(GENES),) * len(variables)))
+    for factor in factors:
+        result = result.multiply(factor)
+    return result
+
+
+def marginals(people, probs):
+    """
+    Return each person's gene and trait distribution given the known
+    traits, in the same form `heredity.main` prints.
+
+    People's gene counts are eliminated one at a time in min-fill
+    order, which builds a tree of clusters: eliminating a person
+    multiplies their own factors with the messages left by earlier
+    eliminations that mention them, and passes one message on. A second
+    pass back down the tree sends each cluster the evidence from
+    everywhere else, so every person's marginal comes from a single
+    upward and downward pass. The work grows with the size of the largest
+    cluster, the width of the pedigree, rather than with the number of
+    people.
+    """
+    factors = person_factors(people, probs)
+    order = elimination_order(people)
+
+    # upward pass: eliminating each person in turn, with factors and
+    # messages indexed by the people they mention
+    pool = dict(enumerate((factor, None) for factor in factors))
+    mentions = {person: set() for person in people}
+    for i, factor in enumerate(factors):
+        for variable in factor.variables:
+            mentions[variable].add(i)
+
+    clusters = []
+    for person in order:
+        involved = []
+        for i in sorted(mentions.pop(person)):
+            factor, source = pool.pop(i)
+            for variable in factor.variables:
+                if variable != person:
+                    mentions[variable].discard(i)
+            involved.append((factor, source))
+
+        cluster = {
+            "person": person,
+            "factors": [factor for factor, source in involved if source is None],
+            "children": [source for factor, source in involved if source is not None],
+            "up": None,
+            "down": None
+        }
+        message = product(factor for factor, _ in involved)
+        cluster["up"] = message.marginal(set(message.variables) - {person}).normalized()
+
+        key = len(factors) + len(clusters)
+        pool[key] = (cluster["up"], len(clusters))
+        for variable in cluster["up"].variables:
+            mentions[variable].add(key)
+        clusters.append(cluster)
+
+    # downward pass: clusters are sent evidence in reverse order of elimination,
+    # so a cluster's own message from above is ready before it sends any
+    probabilities = {}
+    for cluster in reversed(clusters):
+        person = cluster["person"]
+        incoming = list(cluster["factors"])
+        if cluster["down"] is not None:
+            incoming.append(cluster["down"])
+
+        for child in cluster["children"]:
+            others = [clusters[other]["up"] for other in cluster["children"] if other != child]
+            message = product(incoming + others, (person,))
+            clusters[child]["down"] = message.marginal(clusters[child]["up"].variables).normalized()
+
+        belief = product(incoming + [clusters[child]["up"] for child in cluster["children"]], (person,))
+        genes = belief.marginal({person}).normalized().table
+        probabilities[person] = {
+            "gene": {gene: float(genes[gene]) for gene in reversed(GENES)},
+            "trait": trait_distribution(people[person]["trait"], genes, probs)
+        }
+
+    return {person: probabilities[person] for person in people}
+
+
+def person_factors(people, probs):
+    """
+    Return one factor per person: the probability of their gene count,
+    from the unconditional distribution or from their parents' gene
+    counts, times the probability of their trait if it is known.
+    """
+    inheritance = inheritance_table(probs)
+    factors = []
+    for person in people:
+        evidence = np.array([
+            probs["trait"][gene][people[person]["trait"]]
+            if people[person]["trait"] is not None else 1
+            for gene in GENES
+        ])
+        mother, father = people[person]["mother"], people[person]["father"]
+        if mother is None and father is None:
+            prior = np.array([probs["gene"][gene] for gene in GENES])
+            factors.append(Factor([person], prior * evidence))
+        else:
+            factors.append(Factor([mother, father, person], inheritance * evidence))
+    return factors
+
+
+def inheritance_table(probs):
+    """
+    Return P(child's gene count | mother's, father's) as a 3x3x3 array
+    indexed by the mother's, father's and child's gene counts.
+    """
+    mutation = probs["mutation"]
+    passes = np.array([mutation, 0.5, 1 - mutation])
+    mother = passes[:, np.newaxis]
+    father = passes[np.newaxis, :]
+    return np.stack([
+        (1 - mother) * (1 - father),
+        mother * (1 - father) + (1 - mother) * father,
+        mother * father
+    ], axis=-1)
+
+
+def trait_distribution(trait, genes, probs):
+    """
+    Return the trait distribution of a person whose gene counts have
+    posterior `genes`: certain if their trait is known, and otherwise
+    the chance of the trait under each gene count, weighted by `genes`.
+    """
+    if trait is not None:
+        return {True: float(trait), False: float(not trait)}
+    has_trait = sum(genes[gene] * probs["trait"][gene][True] for gene in GENES)
+    return {True: float(has_trait), False: float(1 - has_trait)}
+
+
+def elimination_order(people):
+    """
+    Return an order to eliminate people in, choosing each time the
+    person whose elimination adds the fewest new edges between their
+    remaining neighbours, then the one with fewest neighbours.
+
+    Neighbours are people who share a factor: parents and their
+    children, and the two parents of each child.
+    """
+    neighbours = {person: set() for person in people}
+    for person in people:
+        family = {people[person]["mother"], people[person]["father"], person} - {None}
+        for relative in family:
+            neighbours[relative] |= family - {relative}
+
+    def score(person):
+        around = list(neighbours[person])
+        fill = sum(
+            1
+            for i in range(len(around))
+            for j in range(i + 1, len(around))
+            if around[j] not in neighbours[around[i]]
+        )
+        return fill, len(around)
+
+    # a heap of scores, where entries left stale by a change in a
+    # person's neighbourhood are skipped when they come up
+    scores = {person: score(person) for person in people}
+    heap = [(scores[person], i, person) for i, person in enumerate(people)]
+    heapq.heapify(heap)
+    counter = len(heap)
+
+    order = []
+    while heap:
+        entry, _, person = heapq.heappop(heap)
+        if person not in scores or entry != scores[person]:
+            continue
+        del scores[person]
+        around = neighbours.pop(person)
+        for relative in around:
+            neighbours[relative] |= around - {relative}
+            neighbours[relative].discard(person)
+        order.append(person)
+
+        # the fill of anyone next to a new edge may have changed
+        affected = set(around)
+        for relative in around:
+            affected |= neighbours[relative]
+        for relative in affected:
+            scores[relative] = score(relative)
+            heapq.heappush(heap, (scores[relative], counter, relative))
+            counter += 1
+    return order
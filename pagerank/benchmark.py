@@ -0,0 +1,185 @@
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+import pagerank
+from linkgraph import LinkGraph
+
+# Corpus sizes benchmarked by default, and the share of pages without links
+SIZES = [1000, 10000, 100000]
+DANGLING = 0.1
+
+# Links per linking page follow a Pareto distribution with this shape
+# and minimum, capped at MAX_LINKS
+LINK_SHAPE = 1.5
+MIN_LINKS = 3
+MAX_LINKS = 1000
+
+# Higher skew concentrates incoming links on fewer pages
+POPULARITY_SKEW = 2.5
+
+# Budgets each method is run at, from quick and rough to slow and precise
+SAMPLES = [10000, 100000]
+WALK_STEPS = [100, 1000]
+TOLERANCES = [1e-4, 1e-8]
+
+# L1 change at which the reference ranks are taken as exact
+REFERENCE_TOLERANCE = 1e-13
+
+
+def main():
+    if len(sys.argv) > 4:
+        sys.exit("Usage: python benchmark.py [sizes] [dangling] [output]")
+
+    # Parse command-line arguments
+    sizes = [int(size) for size in sys.argv[1].split(",")] if len(sys.argv) >= 2 else SIZES
+    dangling = float(sys.argv[2]) if len(sys.argv) >= 3 else DANGLING
+    output = sys.argv[3] if len(sys.argv) == 4 else None
+
+    report = benchmark(sizes, dangling)
+    print_report(report)
+    if output is not None:
+        with open(output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+def benchmark(sizes=SIZES, dangling=DANGLING, seed=0):
+    """
+    Rank synthetic corpora of each size with every ranking method at
+    each of its budgets.
+
+    Returns a JSON-serializable report with, for every run, the wall
+    time, the peak memory allocated, the iterations or samples used, and
+    the L1 error against reference ranks iterated to REFERENCE_TOLERANCE.
+    """
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "damping": pagerank.DAMPING,
+        "corpora": []
+    }
+
+    for size in sizes:
+        graph = scale_free_graph(size, dangling, seed)
+        reference, _ = pagerank.solve_pagerank(
+            graph, pagerank.DAMPING, tolerance=REFERENCE_TOLERANCE, max_iterations=10000
+        )
+        reference = graph.to_dict(reference)
+
+        runs = []
+        for method, budget, rank in methods(graph, seed):
+            ranks, seconds, peak, work = measure(rank)
+            runs.append({
+                "method": method,
+                "budget": budget,
+                "seconds": round(seconds, 4),
+                "peak_mb": round(peak / 2 ** 20, 2),
+                **work,
+                "l1_error": sum(abs(ranks[page] - reference[page]) for page in reference)
+            })
+
+        report["corpora"].append({
+            "pages": size,
+            "links": len(graph.targets),
+            "dangling": int(graph.dangling.sum()),
+            "runs": runs
+        })
+    return report
+
+
+def scale_free_graph(pages, dangling=DANGLING, seed=None):
+    """
+    Returns a LinkGraph of `pages` synthetic pages, a `dangling` share of
+    them without links.
+
+    Links per page are heavy-tailed, and link targets are drawn with a
+    popularity skew so that in-degrees follow a power law, with a few
+    pages linked from everywhere and most barely linked at all.
+    """
+    rng = np.random.default_rng(seed)
+    linking = rng.random(pages) >= dangling
+    links = np.minimum(MIN_LINKS * (rng.pareto(LINK_SHAPE, pages) + 1), MAX_LINKS).astype(np.int64)
+    links[~linking] = 0
+
+    sources = np.repeat(np.arange(pages), links)
+
+    # spreading popularity over pages with a permutation so popular
+    # pages aren't simply the lowest indices
+    ranks = (pages * rng.random(len(sources)) ** POPULARITY_SKEW).astype(np.int64)
+    targets = rng.permutation(pages)[ranks]
+
+    # dropping self links and repeats, as crawl does
+    keep = sources != targets
+    edges = np.unique(sources[keep] * pages + targets[keep])
+    return LinkGraph([f"{page}.html" for page in range(pages)], edges // pages, edges % pages)
+
+
+def methods(graph, seed):
+    """
+    Yields (method, budget, rank) for every run, where `rank()` returns
+    the ranks and a dictionary of the iterations or samples it used.
+    """
+    d = pagerank.DAMPING
+
+    for samples in SAMPLES:
+        def sample(samples=samples):
+            random.seed(seed)
+            return pagerank.sample_pagerank(graph, d, samples), {"samples": samples}
+        yield "sample", samples, sample
+
+    for steps in WALK_STEPS:
+        def walk(steps=steps):
+            # with no tolerance, walking stops at the first whole
+            # batch past `steps`, after at least MIN_BATCHES batches
+            ranks, _, stats = pagerank.walk_pagerank(
+                graph, d, seed=seed, tolerance=0, max_steps=steps, return_stats=True
+            )
+            return ranks, {"samples": stats.samples}
+        yield "walk", steps, walk
+
+    for solver in pagerank.SOLVERS:
+        for tolerance in TOLERANCES:
+            def iterate(solver=solver, tolerance=tolerance):
+                ranks, stats = pagerank.iterate_pagerank(
+                    graph, d, tolerance, solver, return_stats=True
+                )
+                return ranks, {"iterations": stats.iterations}
+            yield solver, tolerance, iterate
+
+
+def measure(rank):
+    """
+    Run `rank` twice, once timed and once with its memory traced, since
+    tracing slows Python-level loops down. Returns the ranks, the wall
+    time, the peak bytes allocated and the work reported by `rank`.
+    """
+    start = time.perf_counter()
+    ranks, work = rank()
+    seconds = time.perf_counter() - start
+
+    tracemalloc.start()
+    rank()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return ranks, seconds, peak, work
+
+
+def print_report(report):
+    for corpus in report["corpora"]:
+        print(f"{corpus['pages']} pages, {corpus['links']} links, {corpus['dangling']} dangling")
+        print(f"  {'method':<14} {'budget':>8} {'seconds':>9} {'peak MB':>9} "
+              f"{'iterations':>10} {'samples':>10} {'L1 error':>10}")
+        for run in corpus["runs"]:
+            print(f"  {run['method']:<14} {run['budget']:>8g} {run['seconds']:>9.4f} "
+                  f"{run['peak_mb']:>9.2f} {run.get('iterations', ''):>10} "
+                  f"{run.get('samples', ''):>10} {run['l1_error']:>10.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+import mmap
+import os
+import re
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from linkgraph import LinkGraph
+
+# Same pattern as pagerank.crawl, over raw bytes
+LINK_PATTERN = re.compile(rb"<a\s+(?:[^>]*?)href=\"([^\"]*)\"")
+
+# Files each worker scans per task
+CHUNK_SIZE = 256
+
+# Page name to index, set in each worker process by init_worker
+page_index = None
+
+
+def crawl_graph(directory, workers=None):
+    """
+    Parse a directory of HTML pages into a LinkGraph, scanning the
+    files in parallel on `workers` processes (one per core by default).
+
+    Each file is scanned through a memory-mapped buffer and reduced to
+    the indices of the corpus pages it links to, so only the growing
+    integer edge list is ever held in memory, never the page contents.
+    """
+    pages = list_pages(directory)
+    sources = array("q")
+    targets = array("q")
+    for chunk_sources, chunk_targets in scan_pages(directory, pages, workers):
+        sources.extend(chunk_sources)
+        targets.extend(chunk_targets)
+
+    return LinkGraph(
+        pages,
+        np.frombuffer(sources, dtype=np.int64),
+        np.frombuffer(targets, dtype=np.int64)
+    )
+
+
+def list_pages(directory):
+    """
+    Returns the sorted names of the HTML pages in `directory`.
+    """
+    with os.scandir(directory) as entries:
+        return sorted(entry.name for entry in entries if entry.name.endswith(".html"))
+
+
+def scan_pages(directory, pages, workers=None):
+    """
+    Yields the (sources, targets) arrays of the links out of each run
+    of CHUNK_SIZE consecutive `pages`, in order, scanned in parallel
+    on `workers` processes.
+    """
+    index = {page: i for i, page in enumerate(pages)}
+    chunks = [
+        (directory, start, pages[start:start + CHUNK_SIZE])
+        for start in range(0, len(pages), CHUNK_SIZE)
+    ]
+
+    if workers == 1 or len(chunks) <= 1:
+        init_worker(index)
+        yield from map(scan_chunk, chunks)
+    else:
+        with ProcessPoolExecutor(workers, initializer=init_worker, initargs=(index,)) as executor:
+            yield from executor.map(scan_chunk, chunks)
+
+
+def init_worker(index):
+    global page_index
+    page_index = index
+
+
+def scan_chunk(chunk):
+    """
+    Scan a run of consecutive pages starting at page `start`, returning
+    (sources, targets) arrays with one entry per link to another page
+    in the corpus.
+    """
+    directory, start, pages = chunk
+    sources = array("q")
+    targets = array("q")
+    for page, filename in enumerate(pages, start):
+        links = scan_links(os.path.join(directory, filename))
+        for link in links - {page}:
+            sources.append(page)
+            targets.append(link)
+    return sources, targets
+
+
+def scan_links(path):
+    """
+    Returns the set of corpus page indices linked to by the file at `path`.
+    """
+    links = set()
+    with open(path, "rb") as f:
+        try:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # empty files can't be mapped, and have no links anyway
+            return links
+        with buffer:
+            for match in LINK_PATTERN.finditer(buffer):
+                link = page_index.get(match.group(1).decode("utf-8", "replace"))
+                if link is not None:
+                    links.add(link)
+    return links
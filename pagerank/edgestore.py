@@ -0,0 +1,266 @@
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from crawler import list_pages, scan_pages
+from linkcache import decode_names, encode_names
+
+# Pages in each destination block
+BLOCK_PAGES = 2 ** 16
+
+# Links read from the edge list at a time, bounding memory however
+# many links point into one block
+SEGMENT_EDGES = 2 ** 20
+
+# Block files kept open at once while writing, well under the usual
+# limit on open files; stores with more blocks are written in passes
+MAX_OPEN_BUCKETS = 256
+
+# Files an edge store is written as, inside its own directory
+EDGES_FILE = "edges.bin"
+INDEX_FILE = "index.npz"
+
+
+class EdgeStore():
+    """
+    Link structure of a corpus kept on disk, for corpora whose links
+    don't fit in memory. Pages are split into blocks of BLOCK_PAGES
+    consecutive pages, and links are stored as a flat binary list of
+    (source, target) records sorted by the block of their target, so the
+    links into each block are one contiguous run of the file, read back
+    through memory maps. Within a block links stay in crawl order, which
+    is by source, so reading their sources' ranks walks forward in memory.
+
+    An EdgeStore can stand in for a LinkGraph in `solve_pagerank`:
+    `spread` streams through the file a segment at a time, so only the
+    per-page vectors and SEGMENT_EDGES links are held in memory at once.
+    """
+    def __init__(self, path):
+        self.path = path
+        with np.load(os.path.join(path, INDEX_FILE), allow_pickle=False) as index:
+            self.names = index["names"]
+            self.name_offsets = index["name_offsets"]
+            self.out_degrees = index["out_degrees"]
+            self.block_starts = index["block_starts"]
+            self.block_offsets = index["block_offsets"]
+            edge_dtype = index["edge_dtype"].item()
+        self.dtype = np.dtype([("source", edge_dtype), ("target", edge_dtype)])
+
+        self.dangling = self.out_degrees == 0
+        with np.errstate(divide="ignore"):
+            self.inverse_degrees = 1 / self.out_degrees
+        self.pages = None
+
+    @classmethod
+    def write(cls, path, pages, chunks, block_pages=BLOCK_PAGES):
+        """
+        Write an edge store for `pages` to the directory `path` and open it.
+
+        `chunks` is an iterable of (sources, targets) arrays of page
+        indices. Each chunk is split by destination block and appended to
+        a temporary file for that block, and the block files are then
+        copied one after another into the edge list, so no more than one
+        chunk of links is in memory at a time.
+
+        With more than MAX_OPEN_BUCKETS blocks, the chunks, each grouped
+        by block, are first spilled into one file, and the block files
+        are filled from it in passes over MAX_OPEN_BUCKETS blocks at a
+        time, so only that many are ever open.
+
+        An existing store at `path` is replaced, but anything else there
+        raises FileExistsError rather than being deleted.
+        """
+        if os.path.lexists(path) and not is_store(path):
+            raise FileExistsError(f"{path} exists and is not an edge store")
+
+        N = len(pages)
+        dtype = "<i4" if N < 2 ** 31 else "<i8"
+        block_starts = np.arange(0, N + block_pages, block_pages).clip(max=N)
+        if len(block_starts) < 2:
+            block_starts = np.array([0, N])
+        blocks = len(block_starts) - 1
+        out_degrees = np.zeros(N, dtype=np.int64)
+        record = 2 * np.dtype(dtype).itemsize
+
+        def runs():
+            # each chunk's links grouped by block, counting out-degrees on the way
+            for sources, targets in chunks:
+                sources = np.asarray(sources, dtype=dtype)
+                targets = np.asarray(targets, dtype=dtype)
+                pages_linking, counts = np.unique(sources, return_counts=True)
+                out_degrees[pages_linking] += counts
+                yield group_by_block(sources, targets, block_starts)
+
+        # writing to a temporary directory first so a reader never opens half a store
+        temporary = tempfile.mkdtemp(dir=os.path.dirname(os.path.abspath(path)))
+        try:
+            groups = list(range(0, blocks, MAX_OPEN_BUCKETS)) + [blocks]
+            if len(groups) == 2:
+                fill_buckets(temporary, 0, blocks, runs())
+            else:
+                spill = os.path.join(temporary, "spill.tmp")
+                run_bounds = []
+                offset = 0
+                with open(spill, "wb") as f:
+                    for links, bounds in runs():
+                        f.write(links.tobytes())
+                        run_bounds.append(offset + bounds[groups])
+                        offset += len(links)
+
+                for g, (first, last) in enumerate(zip(groups, groups[1:])):
+                    spilled = (
+                        np.fromfile(spill, dtype=dtype, count=2 * (bounds[g + 1] - bounds[g]),
+                                    offset=bounds[g] * record).reshape(-1, 2)
+                        for bounds in run_bounds
+                    )
+                    fill_buckets(temporary, first, last, (
+                        group_by_block(links[:, 0], links[:, 1], block_starts)
+                        for links in spilled
+                    ))
+                os.remove(spill)
+
+            block_offsets = [0]
+            with open(os.path.join(temporary, EDGES_FILE), "wb") as f:
+                for b in range(blocks):
+                    bucket = os.path.join(temporary, f"block{b}.tmp")
+                    with open(bucket, "rb") as links:
+                        shutil.copyfileobj(links, f)
+                    block_offsets.append(block_offsets[-1] + os.path.getsize(bucket) // record)
+                    os.remove(bucket)
+
+            names, name_offsets = encode_names(pages)
+            np.savez(
+                os.path.join(temporary, INDEX_FILE),
+                names=names,
+                name_offsets=name_offsets,
+                out_degrees=out_degrees,
+                block_starts=block_starts.astype(np.int64),
+                block_offsets=np.array(block_offsets, dtype=np.int64),
+                edge_dtype=np.array(dtype)
+            )
+
+            # checking again, in case something was put there while writing
+            if os.path.lexists(path):
+                if not is_store(path):
+                    raise FileExistsError(f"{path} exists and is not an edge store")
+                shutil.rmtree(path)
+            os.replace(temporary, path)
+        except BaseException:
+            shutil.rmtree(temporary, ignore_errors=True)
+            raise
+        return cls(path)
+
+    @classmethod
+    def from_graph(cls, path, graph, block_pages=BLOCK_PAGES):
+        """
+        Write a LinkGraph out as an edge store.
+        """
+        return cls.write(path, graph.pages, [(graph.sources, graph.targets)], block_pages)
+
+    @classmethod
+    def from_directory(cls, directory, path, block_pages=BLOCK_PAGES, workers=None):
+        """
+        Crawl a directory of HTML pages straight into an edge store,
+        never holding more than one chunk of the corpus's links in memory.
+        """
+        pages = list_pages(directory)
+        return cls.write(path, pages, scan_pages(directory, pages, workers), block_pages)
+
+    def __len__(self):
+        return len(self.out_degrees)
+
+    def __iter__(self):
+        """
+        Yields each block as (start, end, segments), the form
+        `gauss_seidel_sweep` takes, where `segments` reads the links into
+        the block from the file SEGMENT_EDGES at a time as
+        (sources, targets - start, weights) arrays.
+        """
+        for b in range(len(self.block_starts) - 1):
+            start, end = int(self.block_starts[b]), int(self.block_starts[b + 1])
+            yield start, end, self.segments(b)
+
+    def segments(self, block):
+        """
+        Yields the links into `block` in runs of up to SEGMENT_EDGES.
+
+        Each run is mapped on its own and unmapped once read, so the pages
+        of the file already used don't stay resident, and a block with
+        very many links into it is never read in all at once.
+        """
+        start = int(self.block_starts[block])
+        first, last = int(self.block_offsets[block]), int(self.block_offsets[block + 1])
+        path = os.path.join(self.path, EDGES_FILE)
+        for offset in range(first, last, SEGMENT_EDGES):
+            count = min(SEGMENT_EDGES, last - offset)
+            links = np.memmap(path, dtype=self.dtype, mode="r",
+                              offset=offset * self.dtype.itemsize, shape=(count,))
+            sources = links["source"].astype(np.intp)
+            targets = links["target"] - start
+            del links
+            yield sources, targets, self.inverse_degrees[sources]
+
+    def spread(self, ranks):
+        """
+        Returns the rank each page receives over its incoming links,
+        computed one destination block at a time.
+        """
+        spread = np.zeros(len(self))
+        for start, end, segments in self:
+            for sources, targets, weights in segments:
+                spread[start:end] += np.bincount(
+                    targets, weights=ranks[sources] * weights, minlength=end - start
+                )
+        return spread
+
+    def to_dict(self, ranks):
+        """
+        Returns a {page: rank} dictionary for a rank vector.
+        """
+        if self.pages is None:
+            self.pages = decode_names(self.names, self.name_offsets)
+        return dict(zip(self.pages, ranks.tolist()))
+
+
+def is_store(path):
+    """
+    Returns whether `path` is a directory holding an edge store, and
+    nothing else, so replacing it can't lose anything.
+    """
+    return (
+        os.path.isdir(path) and not os.path.islink(path)
+        and set(os.listdir(path)) == {EDGES_FILE, INDEX_FILE}
+    )
+
+
+def group_by_block(sources, targets, block_starts):
+    """
+    Returns a chunk's links as (source, target) rows grouped by the
+    block of their target, keeping their order within each block, and
+    the row each block's links start at.
+    """
+    block_of = np.searchsorted(block_starts, targets, side="right") - 1
+    order = np.argsort(block_of, kind="stable")
+    links = np.column_stack([sources[order], targets[order]])
+    bounds = np.searchsorted(block_of[order], np.arange(len(block_starts)))
+    return links, bounds
+
+
+def fill_buckets(directory, first, last, runs):
+    """
+    Appends the links into blocks `first` to `last` from each of `runs`,
+    (links, bounds) pairs from `group_by_block`, to one file per block.
+    """
+    buckets = {
+        b: open(os.path.join(directory, f"block{b}.tmp"), "wb")
+        for b in range(first, last)
+    }
+    try:
+        for links, bounds in runs:
+            for b in np.flatnonzero(np.diff(bounds[first:last + 1])) + first:
+                buckets[b].write(links[bounds[b]:bounds[b + 1]].tobytes())
+    finally:
+        for bucket in buckets.values():
+            bucket.close()
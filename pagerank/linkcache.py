@@ -0,0 +1,106 @@
+import os
+import zipfile
+
+import numpy as np
+
+# Cache file kept inside each corpus directory
+LINK_CACHE = ".linkcache.npz"
+
+
+def read_link_cache(directory):
+    """
+    Returns the links cached for `directory` as a dictionary mapping
+    each filename to ((size, mtime_ns), set of linked filenames),
+    or an empty dictionary if there is no readable cache.
+    """
+    # a truncated or inconsistent cache is treated like a missing one,
+    # so the next crawl rebuilds it
+    try:
+        with np.load(os.path.join(directory, LINK_CACHE), allow_pickle=False) as data:
+            data = {name: data[name] for name in data.files}
+
+        names = decode_names(data["names"], data["name_offsets"])
+        files = data["files"].tolist()
+        links = data["links"].tolist()
+        link_offsets = data["link_offsets"].tolist()
+        sizes = data["sizes"].tolist()
+        mtimes = data["mtimes"].tolist()
+        if not len(files) == len(sizes) == len(mtimes) == len(link_offsets) - 1:
+            return {}
+        if link_offsets[-1] != len(links) or any(a > b for a, b in zip(link_offsets, link_offsets[1:])):
+            return {}
+        if min(files + links, default=0) < 0 or max(files + links, default=-1) >= len(names):
+            return {}
+
+        cache = {}
+        for i, name in enumerate(files):
+            cache[names[name]] = (
+                (sizes[i], mtimes[i]),
+                {names[link] for link in links[link_offsets[i]:link_offsets[i + 1]]}
+            )
+    except (OSError, EOFError, ValueError, KeyError, IndexError, TypeError, zipfile.BadZipFile):
+        return {}
+    return cache
+
+
+def write_link_cache(directory, cache):
+    """
+    Save a dictionary like the one `read_link_cache` returns.
+
+    Every filename and link is stored once in a UTF-8 name table,
+    and files and links refer to it by index, all in flat arrays.
+    """
+    index = {}
+
+    def name_id(name):
+        if name not in index:
+            index[name] = len(index)
+        return index[name]
+
+    files = []
+    sizes = []
+    mtimes = []
+    link_offsets = [0]
+    links = []
+    for filename, ((size, mtime), file_links) in cache.items():
+        files.append(name_id(filename))
+        sizes.append(size)
+        mtimes.append(mtime)
+        links.extend(name_id(link) for link in file_links)
+        link_offsets.append(len(links))
+
+    names, name_offsets = encode_names(index)
+
+    # writing to a temporary file first so a reader never loads half a cache
+    path = os.path.join(directory, LINK_CACHE)
+    temporary = f"{path}.tmp"
+    with open(temporary, "wb") as f:
+        np.savez(
+            f,
+            names=names,
+            name_offsets=name_offsets,
+            files=np.array(files, dtype=np.int64),
+            sizes=np.array(sizes, dtype=np.int64),
+            mtimes=np.array(mtimes, dtype=np.int64),
+            link_offsets=np.array(link_offsets, dtype=np.int64),
+            links=np.array(links, dtype=np.int64)
+        )
+    os.replace(temporary, path)
+
+
+def encode_names(names):
+    blob = bytearray()
+    offsets = [0]
+    for name in names:
+        blob += name.encode("utf-8", "surrogateescape")
+        offsets.append(len(blob))
+    return np.frombuffer(bytes(blob), dtype=np.uint8), np.array(offsets, dtype=np.int64)
+
+
+def decode_names(blob, offsets):
+    blob = blob.tobytes()
+    offsets = offsets.tolist()
+    return [
+        blob[offsets[i]:offsets[i + 1]].decode("utf-8", "surrogateescape")
+        for i in range(len(offsets) - 1)
+    ]
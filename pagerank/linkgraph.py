@@ -0,0 +1,176 @@
+import numpy as np
+
+try:
+    from scipy import sparse
+except ImportError:
+    sparse = None
+
+
+class LinkGraph():
+    """
+    Link structure of a corpus with pages numbered densely from 0 in
+    sorted order, stored as a sparse matrix in coordinate form: link `k`
+    goes from page `sources[k]` to page `targets[k]` and carries
+    `weights[k]`, the share of its source's rank it passes on. Links are
+    sorted by source, so `offsets` also gives the matrix in CSR form.
+    """
+    def __init__(self, pages, sources, targets):
+        # keeping links grouped by source, so each page's links are
+        # the slice targets[offsets[page]:offsets[page + 1]]
+        order = np.argsort(sources, kind="stable")
+        self.pages = pages
+        self.sources = sources[order]
+        self.targets = targets[order]
+
+        self.out_degrees = np.bincount(self.sources, minlength=len(pages))
+        self.offsets = np.zeros(len(pages) + 1, dtype=np.int64)
+        np.cumsum(self.out_degrees, out=self.offsets[1:])
+
+        # pages without links, whose rank is spread over every page
+        self.dangling = self.out_degrees == 0
+
+        self.weights = 1 / self.out_degrees[self.sources]
+
+        # the link matrix in scipy's CSR form, built by spread_rows on first use
+        self.matrix = None
+
+    @classmethod
+    def from_corpus(cls, corpus):
+        """
+        Build a link graph from a `crawl` dictionary, ignoring
+        links to pages outside the corpus.
+        """
+        pages = sorted(corpus)
+        index = {page: i for i, page in enumerate(pages)}
+        sources = []
+        targets = []
+        for page in pages:
+            for link in corpus[page]:
+                if link in index:
+                    sources.append(index[page])
+                    targets.append(index[link])
+        return cls(
+            pages,
+            np.array(sources, dtype=np.int64),
+            np.array(targets, dtype=np.int64)
+        )
+
+    @classmethod
+    def of(cls, corpus):
+        """
+        Returns `corpus` itself if it is already a LinkGraph, such as one
+        from `crawler.crawl_graph`, or else builds one from it.
+        """
+        if isinstance(corpus, cls):
+            return corpus
+        return cls.from_corpus(corpus)
+
+    def apply_diff(self, diff):
+        """
+        Returns a new link graph with the pages and links in `diff` added
+        and removed, the same graph `pagerank.apply_diff` gives for the
+        corpus, by patching the link arrays rather than rebuilding them.
+        """
+        removed = set(diff.get("removed_pages", ()))
+        added = set(diff.get("added_pages", ()))
+        sources, targets = self.sources, self.targets
+
+        # pages keep their numbers unless pages come or go
+        pages = self.pages
+        if removed or added:
+            pages = sorted((set(self.pages) - removed) | added)
+        index = {page: i for i, page in enumerate(pages)}
+
+        if pages is not self.pages:
+            # removed pages lose their links, even if added back, and
+            # links into them go unless they are
+            renumber = np.array([index.get(page, -1) for page in self.pages], dtype=np.int64)
+            cleared = np.array([page in removed for page in self.pages], dtype=bool)
+            keep = ~cleared[sources] & (renumber[targets] >= 0)
+            sources = renumber[sources[keep]]
+            targets = renumber[targets[keep]]
+
+        def links(pairs):
+            # links keyed by source * N + target, between distinct pages in the graph
+            return np.array([
+                index[page] * len(pages) + index[link]
+                for page, link in pairs
+                if page in index and link in index and page != link
+            ], dtype=np.int64)
+
+        # the diff's links are few, so each link of the graph is looked up
+        # among them rather than hashing the whole graph's links
+        removed_links = np.unique(links(diff.get("removed_links", ())))
+        if len(removed_links):
+            keep = ~among(sources * len(pages) + targets, removed_links)
+            sources, targets = sources[keep], targets[keep]
+
+        added_links = np.unique(links(diff.get("added_links", ())))
+        if len(added_links):
+            existing = sources * len(pages) + targets
+            existing = existing[among(existing, added_links)]
+            added_links = np.setdiff1d(added_links, existing)
+            sources = np.concatenate([sources, added_links // len(pages)])
+            targets = np.concatenate([targets, added_links % len(pages)])
+
+        return LinkGraph(pages, sources, targets)
+
+    def to_corpus(self):
+        """
+        Returns the `crawl`-style dictionary of each page's linked pages.
+        """
+        return {
+            page: {self.pages[link] for link in self.targets[self.offsets[i]:self.offsets[i + 1]]}
+            for i, page in enumerate(self.pages)
+        }
+
+    def __len__(self):
+        return len(self.pages)
+
+    def spread(self, ranks):
+        """
+        Returns the rank each page receives over its incoming links,
+        a sparse matrix-vector product done in one vectorized pass.
+        """
+        return np.bincount(
+            self.targets,
+            weights=ranks[self.sources] * self.weights,
+            minlength=len(self.pages)
+        )
+
+    def spread_rows(self, ranks):
+        """
+        Returns `spread` of each row of a (k, pages) matrix of ranks, the
+        product of the link matrix with k rank vectors at once.
+
+        With scipy installed this is one sparse matrix-matrix product,
+        which reads each link once for all k rows. Without it, each row
+        is its own `spread`.
+        """
+        if sparse is not None:
+            if self.matrix is None:
+                N = len(self.pages)
+                self.matrix = sparse.csr_matrix(
+                    (self.weights, (self.targets, self.sources)), shape=(N, N)
+                )
+            return (self.matrix @ ranks.T).T
+
+        spread = np.empty(ranks.shape)
+        for row, rank in enumerate(ranks):
+            spread[row] = self.spread(rank)
+        return spread
+
+    def to_dict(self, ranks):
+        """
+        Returns a {page: rank} dictionary for a rank vector.
+        """
+        return dict(zip(self.pages, ranks.tolist()))
+
+
+def among(keys, sorted_keys):
+    """
+    Returns a mask of which `keys` are in the sorted array `sorted_keys`.
+    """
+    found = np.searchsorted(sorted_keys, keys)
+    np.minimum(found, len(sorted_keys) - 1, out=found)
+    return sorted_keys[found] == keys
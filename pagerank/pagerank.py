@@ -3,11 +3,45 @@ import random
 import numpy as np
 import re
 import sys
-import copy
+import time
+from collections import deque
+
+from edgestore import EdgeStore
+from linkcache import read_link_cache, write_link_cache
+from linkgraph import LinkGraph
 
 DAMPING = 0.85
 SAMPLES = 10000
 
+# L1 change between iterations below which PageRank has converged
+TOLERANCE = 1e-6
+MAX_ITERATIONS = 1000
+
+# Iterative solvers, and the norms their convergence can be measured in
+SOLVERS = ("jacobi", "gauss-seidel", "extrapolation")
+NORMS = {"l1": 1, "l2": 2, "max": np.inf}
+
+# Blocks a Gauss-Seidel sweep updates one after another
+GAUSS_SEIDEL_BLOCKS = 64
+
+# Iterations between quadratic extrapolations
+EXTRAPOLATION_PERIOD = 10
+
+# Teleport vectors personalized_pagerank iterates together, enough to
+# share the work of each iteration while the block stays cache-sized
+PERSONALIZED_ROWS = 16
+
+# Random surfers advanced together by walk_pagerank
+WALKERS = 10000
+
+# Steps discarded before counting visits, so walkers that start uniformly
+# forget where they started: 0.85 ** 50 is below 0.0003
+BURN_IN = 50
+
+# Steps in each batch whose visit frequencies estimate the standard error
+BATCH_STEPS = 20
+MIN_BATCHES = 5
+
 
 def main():
     if len(sys.argv) != 2:
@@ -23,22 +57,49 @@ def main():
         print(f"  {page}: {ranks[page]:.4f}")
 
 
-def crawl(directory):
+def crawl(directory, cache=True):
     """
     Parse a directory of HTML pages and check for links to other pages.
     Return a dictionary where each key is a page, and values are
     a list of all other pages in the corpus that are linked to by the page.
+
+    Extracted links are cached in the directory along with each file's
+    size and modification time, so later calls only re-parse files that
+    were added or changed. Pass `cache=False` to parse every file.
     """
     pages = dict()
+    cached = read_link_cache(directory) if cache else {}
+    fingerprints = dict()
 
     # Extract all links from HTML files
-    for filename in os.listdir(directory):
-        if not filename.endswith(".html"):
-            continue
-        with open(os.path.join(directory, filename)) as f:
-            contents = f.read()
-            links = re.findall(r"<a\s+(?:[^>]*?)href=\"([^\"]*)\"", contents)
-            pages[filename] = set(links) - {filename}
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            filename = entry.name
+            if not filename.endswith(".html"):
+                continue
+            stat = entry.stat()
+            fingerprint = (stat.st_size, stat.st_mtime_ns)
+            fingerprints[filename] = fingerprint
+            if filename in cached and cached[filename][0] == fingerprint:
+                pages[filename] = cached[filename][1]
+                continue
+            with open(entry.path) as f:
+                contents = f.read()
+                links = re.findall(r"<a\s+(?:[^>]*?)href=\"([^\"]*)\"", contents)
+                pages[filename] = set(links) - {filename}
+
+    # Save the links before filtering, since a link to a missing page
+    # counts again once that page is added
+    if cache and (cached.keys() != pages.keys() or any(
+        cached[filename][0] != fingerprints[filename] for filename in pages
+    )):
+        try:
+            write_link_cache(directory, {
+                filename: (fingerprints[filename], pages[filename])
+                for filename in pages
+            })
+        except OSError:
+            pass
 
     # Only include links to other pages in the corpus
     for filename in pages:
@@ -92,30 +153,133 @@ def sample_pagerank(corpus, damping_factor, n):
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
     """
+    graph = LinkGraph.of(corpus)
+    N = len(graph)
+
+    # sampling tables built once: the transition model picks one of a
+    # page's links with probability `damping_factor` and otherwise any
+    # page, and a page without links always moves to any page, so every
+    # step is one lookup into these lists or a uniform draw
+    offsets = graph.offsets.tolist()
+    targets = graph.targets.tolist()
+
     # variable for tracking each page that has been visited
-    sample_counter = dict.fromkeys(corpus.keys(), 0)
+    sample_counter = [0] * N
 
     # choosing the 1st sample randomly from the corpus
-    sample = random.choices(list(corpus.keys()), k = 1)[0]
+    sample = random.randrange(N)
     sample_counter[sample] += 1
 
-    # let's get the transition probabilities of the page
-    transition_probs = transition_model(corpus, sample, damping_factor)
-
     # generating all the next samples based on prev samples transition values
-    prev_sample_probs = transition_probs
-    for i in range(n-1):
-        # generating next sample based on prev sample's transition probs
-        next_sample = random.choices(list(prev_sample_probs.keys()), k = 1, weights = list(prev_sample_probs.values()))[0]
-        sample_counter[next_sample] += 1
-        prev_sample_probs = transition_model(corpus, next_sample, damping_factor)
+    for i in range(n - 1):
+        start = offsets[sample]
+        links = offsets[sample + 1] - start
+        if links and random.random() < damping_factor:
+            sample = targets[start + int(random.random() * links)]
+        else:
+            sample = random.randrange(N)
+        sample_counter[sample] += 1
 
     # lets calculate the page rank for each page of the corpus using counter's value
-    page_rank = {k: v/n for (k, v) in sample_counter.items()}
+    return {page: count / n for page, count in zip(graph.pages, sample_counter)}
+
+
+def walk_pagerank(corpus, damping_factor, walkers=WALKERS, seed=None,
+                  tolerance=1e-3, max_steps=10000, return_stats=False):
+    """
+    Return PageRank values for each page by advancing `walkers`
+    independent random surfers together as NumPy arrays.
+
+    Visits are counted in batches of BATCH_STEPS steps, and sampling
+    stops once the standard error of every page's estimate, taken from
+    the spread of the batch estimates, is at most `tolerance`, or after
+    `max_steps` steps, burn-in included. At least MIN_BATCHES batches
+    are always counted, so the errors are estimated from several
+    batches, which makes at least BURN_IN + MIN_BATCHES * BATCH_STEPS
+    steps however small `max_steps` is.
+
+    Return a dictionary of PageRank values, like `sample_pagerank`,
+    and a dictionary of each value's estimated standard error. With
+    `return_stats`, a WalkStats describing the run is returned as well.
+    """
+    start = time.perf_counter()
+    graph = LinkGraph.of(corpus)
+    N = len(graph)
+    rng = np.random.default_rng(seed)
+
+    positions = rng.integers(N, size=walkers)
 
-    return page_rank
+    # letting walkers forget their uniform start before counting visits
+    for i in range(BURN_IN):
+        positions = walk_step(graph, positions, damping_factor, rng)
+    steps = BURN_IN
+
+    batches = []
+    while True:
+        counts = np.zeros(N, dtype=np.int64)
+        for i in range(BATCH_STEPS):
+            positions = walk_step(graph, positions, damping_factor, rng)
+            counts += np.bincount(positions, minlength=N)
+        steps += BATCH_STEPS
+        batches.append(counts / (walkers * BATCH_STEPS))
+
+        if len(batches) < MIN_BATCHES:
+            continue
+        estimates = np.array(batches)
+        ranks = estimates.mean(axis=0)
+        errors = estimates.std(axis=0, ddof=1) / np.sqrt(len(batches))
+        converged = errors.max() <= tolerance
+        if converged or steps >= max_steps:
+            if not return_stats:
+                return graph.to_dict(ranks), graph.to_dict(errors)
+            stats = WalkStats(walkers, steps, len(batches) * BATCH_STEPS, converged)
+            stats.seconds = time.perf_counter() - start
+            return graph.to_dict(ranks), graph.to_dict(errors), stats
 
-def iterate_pagerank(corpus, damping_factor):
+
+class WalkStats():
+    """
+    How a walk_pagerank run went: the steps walked, burn-in included,
+    the steps whose visits were counted, and the time taken.
+    """
+    def __init__(self, walkers, steps, counted_steps, converged):
+        self.walkers = walkers
+        self.steps = steps
+        self.counted_steps = counted_steps
+        self.converged = converged
+        self.seconds = 0.0
+
+    @property
+    def samples(self):
+        """
+        Page visits counted across all walkers.
+        """
+        return self.walkers * self.counted_steps
+
+    def __repr__(self):
+        return (f"WalkStats(walkers={self.walkers}, steps={self.steps}, "
+                f"counted_steps={self.counted_steps}, seconds={self.seconds:.4f}, "
+                f"converged={self.converged})")
+
+
+def walk_step(graph, positions, damping_factor, rng):
+    """
+    Move every walker one step: with probability `damping_factor`, a
+    walker on a page with links follows one of them, chosen by its
+    offset into the page's CSR slice; every other walker teleports.
+    """
+    degrees = graph.out_degrees[positions]
+    follow = (rng.random(len(positions)) < damping_factor) & (degrees > 0)
+
+    moved = rng.integers(len(graph), size=len(positions))
+    starts = graph.offsets[positions[follow]]
+    choices = (rng.random(follow.sum()) * degrees[follow]).astype(np.int64)
+    moved[follow] = graph.targets[starts + choices]
+    return moved
+
+
+def iterate_pagerank(corpus, damping_factor, tolerance=TOLERANCE, solver="jacobi",
+                     norm="l1", max_iterations=MAX_ITERATIONS, return_stats=False):
     """
     Return PageRank values for each page by iteratively updating
     PageRank values until convergence.
@@ -123,51 +287,387 @@ def iterate_pagerank(corpus, damping_factor):
     Return a dictionary where keys are page names, and values are
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
+
+    `corpus` may also be a LinkGraph, or an EdgeStore for a corpus too
+    big to hold in memory. See `solve_pagerank` for the solver options.
+    With `return_stats`, a PageRankStats describing the run is returned
+    as well.
     """
-    # helper function to calculate the sum of all the incoming links page rank for a query page
-    def incoming_links_sum(query_page):
-        sum = 0
-        for page in corpus:
-            if query_page in corpus[page]:
-                sum += prev_page_rank[page]/len(corpus[page])
-        return sum
-    
-    # for any page that doesn't contain any outgoing link, we're it has links to every page
-    # thus making those adjustments to the corpus
-    for page in corpus:
-            if len(corpus[page]) == 0:
-                corpus[page] = set(corpus.keys())
+    graph = corpus if isinstance(corpus, EdgeStore) else LinkGraph.of(corpus)
+    ranks, stats = solve_pagerank(
+        graph, damping_factor, solver, tolerance, norm, max_iterations
+    )
+    if return_stats:
+        return graph.to_dict(ranks), stats
+    return graph.to_dict(ranks)
+
+
+class PageRankStats():
+    """
+    How a solver run went: the change between successive iterates
+    under the chosen norm after each iteration, and the time taken.
+    """
+    def __init__(self, solver, norm, tolerance):
+        self.solver = solver
+        self.norm = norm
+        self.tolerance = tolerance
+        self.iterations = 0
+        self.residuals = []
+        self.seconds = 0.0
+        self.converged = False
+
+    def __repr__(self):
+        residual = self.residuals[-1] if self.residuals else None
+        return (f"PageRankStats(solver={self.solver!r}, iterations={self.iterations}, "
+                f"residual={residual}, seconds={self.seconds:.4f}, converged={self.converged})")
+
+
+def solve_pagerank(graph, damping_factor, solver="jacobi", tolerance=TOLERANCE,
+                   norm="l1", max_iterations=MAX_ITERATIONS, ranks=None):
+    """
+    Return the PageRank vector of a LinkGraph and a PageRankStats.
+
+    `solver` is one of:
+      - "jacobi": power iteration, every page updated from the last iterate
+      - "gauss-seidel": pages updated block by block, each block using
+        the ranks already updated earlier in the same sweep
+      - "extrapolation": power iteration with quadratic extrapolation
+        every EXTRAPOLATION_PERIOD iterations to cancel the slowest
+        decaying error terms
+
+    Iteration stops once the change between iterates measured by `norm`
+    ("l1", "l2" or "max") is at most `tolerance`, or after
+    `max_iterations`. It starts from `ranks` if given, else 1/N everywhere.
+    """
+    if solver not in SOLVERS:
+        raise ValueError(f"unknown solver {solver!r}, expected one of {SOLVERS}")
+    if norm not in NORMS:
+        raise ValueError(f"unknown norm {norm!r}, expected one of {tuple(NORMS)}")
+
+    stats = PageRankStats(solver, norm, tolerance)
+    start = time.perf_counter()
+    N = len(graph)
 
     # begining by assigning each page a rank of 1/N in the corpus
-    N = len(corpus)
-    d = damping_factor
-    page_rank = dict.fromkeys(corpus.keys(), 1/N)
+    if ranks is None:
+        ranks = np.full(N, 1 / N)
+    if solver == "gauss-seidel":
+        blocks = gauss_seidel_blocks(graph)
+    history = deque(maxlen=4)
 
-    # set the current page_rank as the previous, so we can calculate new ranks based on those values
-    prev_vals = np.array(list(page_rank.values()))
-    prev_page_rank = copy.deepcopy(page_rank)
+    while stats.iterations < max_iterations:
+        if solver == "gauss-seidel":
+            new_ranks = gauss_seidel_sweep(graph, damping_factor, ranks, blocks)
+        else:
+            new_ranks = pagerank_step(graph, damping_factor, ranks)
+        stats.iterations += 1
 
-    while True:
-        # calculating new page ranks for each page based on formula PR(p) = 1-d/N + d*sum(PR(i)/NumLinks(i))
-        for page in page_rank:
-            page_rank[page] = ((1 - d)/N) + (d * incoming_links_sum(page))
-        
-        # storing the current page ranks in numpy array to make calculations easier
-        current_vals = np.array(list(page_rank.values()))
-
-        # calculating the change between previous and current rank values
-        difference = abs(prev_vals - current_vals)
-
-        # checking if it crosses the threshold
-        if np.all(np.round(difference, 3) <= 0.001):
+        residual = float(np.linalg.norm(new_ranks - ranks, NORMS[norm]))
+        stats.residuals.append(residual)
+        ranks = new_ranks
+        if residual <= tolerance:
+            stats.converged = True
             break
-        
 
-        # set the current values as previous values
-        prev_vals = current_vals
-        prev_page_rank = page_rank.copy()
+        if solver == "extrapolation":
+            history.append(ranks)
+            if len(history) == 4 and stats.iterations % EXTRAPOLATION_PERIOD == 0:
+                ranks = quadratic_extrapolation(*history)
+                history.clear()
+
+    # guarding against rounding drift in the total
+    ranks = ranks / ranks.sum()
+    stats.seconds = time.perf_counter() - start
+    return ranks, stats
+
+
+def power_iteration(graph, damping_factor, tolerance=TOLERANCE, ranks=None):
+    """
+    Return the PageRank vector of a LinkGraph, iterating
+    PR = (1 - d) / N + d * (M @ PR + dangling mass / N)
+    until the L1 change between iterations is at most `tolerance`.
+
+    Iteration starts from `ranks` if given, or else from 1/N everywhere.
+    """
+    return solve_pagerank(graph, damping_factor, tolerance=tolerance, ranks=ranks)[0]
+
+
+def gauss_seidel_blocks(graph):
+    """
+    Split the pages into up to GAUSS_SEIDEL_BLOCKS ranges, each given as
+    (start, end, segments) where the links into it are split into
+    segments of (sources, targets - start, weights) arrays.
+
+    An EdgeStore is already split this way, and its blocks are read
+    back from disk on each sweep instead.
+    """
+    if isinstance(graph, EdgeStore):
+        return graph
+    N = len(graph)
+    order = np.argsort(graph.targets, kind="stable")
+    targets = graph.targets[order]
+    sources = graph.sources[order]
+    weights = graph.weights[order]
+
+    bounds = np.linspace(0, N, min(N, GAUSS_SEIDEL_BLOCKS) + 1).astype(np.int64)
+    edges = np.searchsorted(targets, bounds)
+    blocks = []
+    for k in range(len(bounds) - 1):
+        start, end = bounds[k], bounds[k + 1]
+        links = slice(edges[k], edges[k + 1])
+        blocks.append((start, end, [(sources[links], targets[links] - start, weights[links])]))
+    return blocks
+
+
+def gauss_seidel_sweep(graph, damping_factor, ranks, blocks):
+    """
+    Return the ranks after one Gauss-Seidel sweep over the blocks.
+    """
+    N = len(graph)
+    d = damping_factor
+    ranks = ranks.copy()
+    dangling_mass = ranks[graph.dangling].sum()
+    for start, end, segments in blocks:
+        incoming = np.zeros(end - start)
+        for sources, targets, weights in segments:
+            incoming += np.bincount(targets, weights=ranks[sources] * weights, minlength=end - start)
+        new_ranks = (1 - d) / N + d * (incoming + dangling_mass / N)
+
+        # later blocks see this block's dangling pages at their new rank
+        dangling = graph.dangling[start:end]
+        dangling_mass += (new_ranks[dangling] - ranks[start:end][dangling]).sum()
+        ranks[start:end] = new_ranks
+
+    # unlike a Jacobi step a sweep doesn't keep the total at 1, and
+    # rescaling it stops that error from decaying only at rate d
+    return ranks / ranks.sum()
+
+
+def quadratic_extrapolation(x0, x1, x2, x3):
+    """
+    Return the quadratic extrapolation of four successive iterates
+    (Kamvar et al., "Extrapolation Methods for Accelerating PageRank
+    Computations"), which removes the components of the error along
+    the two next-largest eigenvectors.
+    """
+    y1 = x1 - x0
+    y2 = x2 - x0
+    y3 = x3 - x0
+    gammas, *_ = np.linalg.lstsq(np.column_stack([y1, y2]), -y3, rcond=None)
+    gamma1, gamma2 = gammas
+    gamma3 = 1.0
+    beta0 = gamma1 + gamma2 + gamma3
+    beta1 = gamma2 + gamma3
+    beta2 = gamma3
+    extrapolated = beta0 * x1 + beta1 * x2 + beta2 * x3
+
+    # a poorly conditioned fit can overshoot, in which case the
+    # plain iterate is kept
+    if not np.all(np.isfinite(extrapolated)) or extrapolated.sum() <= 0:
+        return x3
+    extrapolated = np.maximum(extrapolated, 0)
+    return extrapolated / extrapolated.sum()
+
+
+def pagerank_step(graph, damping_factor, ranks):
+    """
+    Return the ranks after one application of the PageRank formula.
+    """
+    N = len(graph)
+    d = damping_factor
+
+    # pages without links share their rank evenly with every page
+    dangling_mass = ranks[graph.dangling].sum()
+    return (1 - d) / N + d * (graph.spread(ranks) + dangling_mass / N)
+
+
+def update_pagerank(corpus, damping_factor, ranks, diff, push=False, tolerance=TOLERANCE):
+    """
+    Return the corpus after applying `diff`, and its PageRank values
+    computed by warm-starting from the previous `ranks` dictionary.
+
+    `diff` is a dictionary with any of "added_pages" and "removed_pages"
+    (iterables of pages) and "added_links" and "removed_links" (iterables
+    of (page, linked page) pairs). The corpus passed in isn't modified.
+    It may be a crawl dictionary or a LinkGraph; a LinkGraph is updated by
+    patching its link arrays, far faster than rebuilding the graph from a
+    dictionary, and the updated LinkGraph is returned.
+
+    With `push=True`, the change is first propagated by pushing the
+    residual rank the diff left on the pages it touched, which keeps the
+    work to the neighbourhood of a small edit, before a final check by
+    iteration.
+    """
+    previous = LinkGraph.of(corpus)
+    graph = previous.apply_diff(diff)
+    d = damping_factor
+
+    # new pages start at the rank of a page nothing links to, which
+    # with the previous ranks is their teleport and dangling share
+    old_ranks = np.array([ranks.get(page, 1 / len(previous)) for page in previous.pages])
+    if len(previous):
+        baseline = ((1 - d) * old_ranks.sum() + d * old_ranks[previous.dangling].sum()) / len(previous)
+    else:
+        baseline = 1 / len(graph)
+    start = np.array([ranks.get(page, baseline) for page in graph.pages])
+
+    if push:
+        # the residual left by the previous solve is the same before and
+        # after the diff away from the pages it touched, so only the
+        # change in residual is pushed
+        residuals = d * graph.spread(start) + baseline - start
+        old_residuals = d * previous.spread(old_ranks) + baseline - old_ranks
+        if graph.pages is not previous.pages:
+            old_residuals = dict(zip(previous.pages, old_residuals.tolist()))
+            old_residuals = np.array([old_residuals.get(page, 0.0) for page in graph.pages])
+        start = push_pagerank(graph, d, start, residuals - old_residuals, tolerance)
+    else:
+        # rank held by removed pages is shared back out by renormalizing
+        start /= start.sum()
+
+    if not isinstance(corpus, LinkGraph):
+        corpus = apply_diff(corpus, diff)
+    else:
+        corpus = graph
+    return corpus, graph.to_dict(power_iteration(graph, d, tolerance, start))
+
+
+def apply_diff(corpus, diff):
+    """
+    Return a copy of `corpus` with the pages and links in `diff` added
+    and removed, keeping only links between distinct corpus pages.
+    """
+    corpus = {page: set(links) for page, links in corpus.items()}
+    for page in diff.get("removed_pages", ()):
+        corpus.pop(page, None)
+    for page in diff.get("added_pages", ()):
+        corpus.setdefault(page, set())
+    for page, link in diff.get("removed_links", ()):
+        if page in corpus:
+            corpus[page].discard(link)
+    for page, link in diff.get("added_links", ()):
+        if page in corpus:
+            corpus[page].add(link)
+
+    for page in corpus:
+        corpus[page] = set(
+            link for link in corpus[page]
+            if link in corpus and link != page
+        )
+    return corpus
+
+
+def push_pagerank(graph, damping_factor, ranks, residuals, tolerance=TOLERANCE):
+    """
+    Return `ranks` improved by local pushes of `residuals`, the gap
+    between the ranks and one application of the PageRank formula
+    without its terms shared by every page.
+
+    Pushing page u's residual adds it to u's rank and passes
+    `damping_factor` times it on to u's links, so work only happens
+    where the residual is above `tolerance / N`, and a residual that is
+    zero outside a few pages stays local. Pages are pushed in rounds,
+    each a vectorized pass over the pages above the threshold.
+
+    The teleport term and the rank of pages without links reach every
+    page equally, and an equal residual everywhere resolves to a multiple
+    of the PageRank vector itself, so instead of being pushed they are
+    settled at the end by rescaling the ranks to sum to 1.
+    """
+    N = len(graph)
+    d = damping_factor
+    threshold = tolerance / N
+
+    ranks = ranks.copy()
+    residuals = residuals.copy()
+    active = np.flatnonzero(np.abs(residuals) > threshold)
+    while len(active):
+        # every page over the threshold pushes at once, which reads
+        # just the links of those pages
+        pushed = residuals[active]
+        ranks[active] += pushed
+        residuals[active] = 0
+
+        degrees = graph.out_degrees[active]
+        ends = np.cumsum(degrees)
+        links = np.arange(ends[-1]) + np.repeat(graph.offsets[active] - ends + degrees, degrees)
+        targets = graph.targets[links]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            shares = np.repeat(d * pushed / degrees, degrees)
+        np.add.at(residuals, targets, shares)
+
+        # only the pages just pushed to can have crossed the threshold,
+        # but finding them with one vectorized scan beats deduplicating
+        active = np.flatnonzero(np.abs(residuals) > threshold)
+
+    return ranks / ranks.sum()
+
+
+def personalized_pagerank(graph, damping_factor, teleports, tolerance=TOLERANCE,
+                          max_iterations=MAX_ITERATIONS):
+    """
+    Return personalized PageRank for every row of `teleports`, a
+    (k, pages) matrix whose rows are the distributions a random surfer
+    jumps to instead of following a link, with pages in the order of
+    `graph.pages` (see `teleport_matrix`).
+
+    The link graph is built once, and vectors are iterated together
+    PERSONALIZED_ROWS at a time, each iteration one product of the link
+    matrix with a block of rows. Pages without links pass their rank on
+    along each row's own teleport distribution. A row stops being updated
+    once its L1 change is at most `tolerance`.
+
+    Returns a (k, pages) matrix whose rows each sum to 1.
+    """
+    graph = LinkGraph.of(graph)
+    d = damping_factor
+
+    teleports = np.array(teleports, dtype=float).reshape(-1, len(graph))
+    totals = teleports.sum(axis=1, keepdims=True)
+    if np.any(totals <= 0) or np.any(teleports < 0):
+        raise ValueError("teleport vectors must be non-negative and not all zero")
+    teleports /= totals
+
+    dangling = graph.dangling.astype(float)
+    results = np.empty(teleports.shape)
+    for start in range(0, len(teleports), PERSONALIZED_ROWS):
+        rows = np.arange(start, min(start + PERSONALIZED_ROWS, len(teleports)))
+        jumps = teleports[rows]
+        ranks = jumps.copy()
+        for _ in range(max_iterations):
+            dangling_mass = (ranks @ dangling)[:, None]
+            new_ranks = (1 - d) * jumps + d * (graph.spread_rows(ranks) + jumps * dangling_mass)
+
+            # rows that have converged are set aside and drop out of later products
+            converged = np.abs(new_ranks - ranks).sum(axis=1) <= tolerance
+            if converged.any():
+                results[rows[converged]] = new_ranks[converged]
+                rows = rows[~converged]
+                jumps = jumps[~converged]
+                new_ranks = new_ranks[~converged]
+            ranks = new_ranks
+            if not len(rows):
+                break
+        results[rows] = ranks
+
+    return results / results.sum(axis=1, keepdims=True)
+
+
+def teleport_matrix(graph, seed_sets):
+    """
+    Return the (k, pages) teleport matrix jumping uniformly to the
+    pages of each of k seed sets, for `personalized_pagerank`.
+    """
+    graph = LinkGraph.of(graph)
+    index = {page: i for i, page in enumerate(graph.pages)}
+    teleports = np.zeros((len(seed_sets), len(graph)))
+    for row, seeds in enumerate(seed_sets):
+        pages = [index[page] for page in seeds if page in index]
+        if not pages:
+            raise ValueError(f"seed set {row} has no pages in the corpus")
+        teleports[row, pages] = 1 / len(pages)
+    return teleports
 
-    return page_rank
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,99 @@
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from linkgraph import LinkGraph
+
+# Independent chains the samples are split into, fixed so that the
+# results for a seed don't depend on how many workers run them
+SHARDS = 64
+
+# Random numbers drawn from a chain's stream at a time
+DRAWS = 2 ** 16
+
+# CSR link table shared by the parent, attached in each worker by init_worker
+link_table = None
+offsets = None
+targets = None
+
+
+def parallel_sample_pagerank(corpus, damping_factor, n, workers=None, seed=None, shards=SHARDS):
+    """
+    Return PageRank values for each page by sampling `n` pages with the
+    same transition model as `sample_pagerank`, on `workers` processes
+    (one per core by default).
+
+    The samples are split into `shards` independent chains, each with
+    its own random stream spawned from `seed`, so the same seed always
+    gives the same ranks whatever the number of workers. Workers read the
+    link structure from one block of shared memory rather than a copy each,
+    and every chain's visit counts are added up at the end.
+    """
+    graph = LinkGraph.of(corpus)
+    N = len(graph)
+    shards = max(1, min(shards, n))
+    lengths = [n // shards + (shard < n % shards) for shard in range(shards)]
+    streams = np.random.SeedSequence(seed).spawn(shards)
+
+    # offsets followed by targets, as int64 in one shared block
+    size = N + 1 + len(graph.targets)
+    memory = shared_memory.SharedMemory(create=True, size=8 * size)
+    try:
+        table = np.ndarray(size, dtype=np.int64, buffer=memory.buf)
+        table[:N + 1] = graph.offsets
+        table[N + 1:] = graph.targets
+        del table
+
+        counts = np.zeros(N, dtype=np.int64)
+        tasks = [(stream, length, damping_factor) for stream, length in zip(streams, lengths)]
+        with ProcessPoolExecutor(workers, initializer=init_worker, initargs=(memory.name, N)) as executor:
+            for pages, visits in executor.map(sample_chain, tasks):
+                counts[pages] += visits
+    finally:
+        memory.close()
+        memory.unlink()
+
+    return graph.to_dict(counts / n)
+
+
+def init_worker(name, pages):
+    global link_table, offsets, targets
+    link_table = shared_memory.SharedMemory(name=name)
+    table = link_table.buf.cast("q")
+    offsets = table[:pages + 1]
+    targets = table[pages + 1:]
+
+
+def sample_chain(task):
+    """
+    Run one chain of `n` samples from its own random stream, returning
+    the pages it visited and how many times it visited each.
+    """
+    stream, n, damping_factor = task
+    rng = np.random.default_rng(stream)
+    N = len(offsets) - 1
+
+    visits = array("q")
+    sample = int(rng.integers(N))
+    visits.append(sample)
+
+    # drawing random numbers in bulk, so each step is just list lookups
+    remaining = n - 1
+    while remaining:
+        draws = min(DRAWS, remaining)
+        follows = rng.random(draws).tolist()
+        choices = rng.random(draws).tolist()
+        jumps = rng.integers(N, size=draws).tolist()
+        for follow, choice, jump in zip(follows, choices, jumps):
+            start = offsets[sample]
+            links = offsets[sample + 1] - start
+            if links and follow < damping_factor:
+                sample = targets[start + int(choice * links)]
+            else:
+                sample = jump
+            visits.append(sample)
+        remaining -= draws
+
+    return np.unique(np.frombuffer(visits, dtype=np.int64), return_counts=True)